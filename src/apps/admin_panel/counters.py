@@ -0,0 +1,161 @@
+"""
+Dashboard statistics.
+
+Two ways to get the numbers:
+  * aggregate_stats(): one conditional-aggregation query per table
+    (COUNT(*) FILTER (WHERE ...)), always correct, costs a scan of each table.
+  * counter_stats(): reads pre-computed rows from DashboardCounter, O(1) no
+    matter how big the tables get. Enabled with ADMIN_DASHBOARD_COUNTERS; the
+    counters are maintained by signals (signals.py) and by explicit adjust()
+    calls from bulk operations that bypass signals. Seed or repair them with
+    `manage.py rebuild_dashboard_counters`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.properties.models import Property
+from .models import DashboardCounter
+
+User = get_user_model()
+
+NEW_USER_WINDOW_DAYS = 30
+JOINED_PREFIX = 'users.joined:'  # One row per day: users.joined:2025-11-23
+PROPERTY_STATUSES = ('PENDING', 'VERIFIED', 'REJECTED')
+TOTAL_KEYS = (
+    'users.total', 'users.sellers', 'users.brokers',
+    'properties.total', 'properties.pending', 'properties.verified', 'properties.rejected',
+)
+
+
+def counters_enabled():
+    return getattr(settings, 'ADMIN_DASHBOARD_COUNTERS', False)
+
+
+def joined_key(day):
+    return f'{JOINED_PREFIX}{day.isoformat()}'
+
+
+def property_status_key(status):
+    return f'properties.{status.lower()}'
+
+
+def joined_window_start():
+    """First day counted in new_this_month; older users.joined rows are never read."""
+    return timezone.now().date() - timedelta(days=NEW_USER_WINDOW_DAYS - 1)
+
+
+def in_joined_window(day):
+    return day >= joined_window_start()
+
+
+# --- Reading ---
+
+def aggregate_stats():
+    since = timezone.now() - timedelta(days=NEW_USER_WINDOW_DAYS)
+    users = User.objects.aggregate(
+        total=Count('pk'),
+        sellers=Count('pk', filter=Q(is_active_seller=True)),
+        brokers=Count('pk', filter=Q(is_active_broker=True)),
+        new_this_month=Count('pk', filter=Q(date_joined__gte=since)),
+    )
+    properties = Property.objects.aggregate(
+        total=Count('pk'),
+        pending=Count('pk', filter=Q(verification_status='PENDING')),
+        verified=Count('pk', filter=Q(verification_status='VERIFIED')),
+        rejected=Count('pk', filter=Q(verification_status='REJECTED')),
+    )
+    return {'users': users, 'properties': properties}
+
+
+def counter_stats():
+    today = timezone.now().date()
+    rows = dict(
+        DashboardCounter.objects.filter(
+            Q(key__in=TOTAL_KEYS) | Q(key__range=(joined_key(joined_window_start()), joined_key(today)))
+        ).values_list('key', 'value')
+    )
+    return {
+        'users': {
+            'total': rows.get('users.total', 0),
+            'sellers': rows.get('users.sellers', 0),
+            'brokers': rows.get('users.brokers', 0),
+            'new_this_month': sum(v for k, v in rows.items() if k.startswith(JOINED_PREFIX)),
+        },
+        'properties': {
+            'total': rows.get('properties.total', 0),
+            'pending': rows.get('properties.pending', 0),
+            'verified': rows.get('properties.verified', 0),
+            'rejected': rows.get('properties.rejected', 0),
+        },
+    }
+
+
+def dashboard_stats():
+    return counter_stats() if counters_enabled() else aggregate_stats()
+
+
+# --- Writing ---
+
+def adjust(deltas):
+    """
+    Apply {key: delta} to the counters in a single upsert. Call this from any
+    code path that changes users/properties without firing model signals
+    (QuerySet.update(), bulk_create(), ...).
+    """
+    if not counters_enabled():
+        return
+    deltas = sorted((key, delta) for key, delta in deltas.items() if delta)  # Stable lock order
+    if not deltas:
+        return
+    table = DashboardCounter._meta.db_table
+    values = ', '.join(['(%s, %s)'] * len(deltas))
+    params = [item for pair in deltas for item in pair]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (key, value) VALUES {values} '
+            f'ON CONFLICT (key) DO UPDATE SET value = {table}.value + EXCLUDED.value',
+            params,
+        )
+
+
+def prune_joined():
+    """Delete users.joined day rows that have left the new_this_month window."""
+    if not counters_enabled():
+        return 0
+    deleted, _ = DashboardCounter.objects.filter(
+        key__startswith=JOINED_PREFIX, key__lt=joined_key(joined_window_start()),
+    ).delete()
+    return deleted
+
+
+def rebuild():
+    """Recompute every counter from the source tables."""
+    stats = aggregate_stats()
+    values = {
+        'users.total': stats['users']['total'],
+        'users.sellers': stats['users']['sellers'],
+        'users.brokers': stats['users']['brokers'],
+        'properties.total': stats['properties']['total'],
+    }
+    for status in PROPERTY_STATUSES:
+        values[property_status_key(status)] = stats['properties'][status.lower()]
+
+    joined = (
+        User.objects.filter(date_joined__date__gte=joined_window_start())
+        .annotate(day=TruncDate('date_joined'))
+        .values('day')
+        .annotate(n=Count('pk'))
+    )
+    for row in joined:
+        values[joined_key(row['day'])] = row['n']
+
+    with transaction.atomic():
+        DashboardCounter.objects.all().delete()
+        DashboardCounter.objects.bulk_create(DashboardCounter(key=k, value=v) for k, v in values.items())
+    return values
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.admin_panel import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the admin dashboard counters from the users and properties tables."
+
+    def handle(self, *args, **options):
+        values = counters.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(values)} dashboard counters."))
+        if not counters.counters_enabled():
+            self.stdout.write("Note: ADMIN_DASHBOARD_COUNTERS is off, so the dashboard still uses live aggregates.")
@@ -1,3 +1,12 @@
 from django.db import models
 
-# Create your models here.
+class DashboardCounter(models.Model):
+    """
+    Pre-computed dashboard number (e.g. 'properties.pending', 'users.joined:2025-11-23').
+    Kept up to date by apps.admin_panel.counters when ADMIN_DASHBOARD_COUNTERS is on.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+
+MODERATION_STATUS = {'APPROVE': 'VERIFIED', 'REJECT': 'REJECTED'}
+
+
+class ModerationActionSerializer(serializers.Serializer):
+    """Body of AdminPropertyAction: {"action": "APPROVE" | "REJECT", "reason": "..."}"""
+    action = serializers.ChoiceField(
+        choices=list(MODERATION_STATUS),
+        error_messages={'invalid_choice': "Invalid action. Use APPROVE or REJECT"},
+    )
+    reason = serializers.CharField(
+        required=False, allow_blank=True, default='', max_length=2000,
+        error_messages={'invalid': "reason must be a string"},
+    )
+
+
+class BulkModerationItemSerializer(ModerationActionSerializer):
+    """One entry of AdminPropertyBulkAction's "items"."""
+    id = serializers.UUIDField(error_messages={'invalid': "Invalid id"})
+
+    def first_error(self):
+        """The item's first validation message, for its "results" entry."""
+        return next(iter(self.errors.values()))[0]
@@ -0,0 +1,120 @@
+"""
+Keep DashboardCounter rows in step with user/property changes (see counters.py).
+
+Transitions (a seller flag flipping, a listing changing status) are detected
+by reading the stored values in pre_save, and only when counters are on and
+the save writes those fields. Deletes read what they decrement in pre_delete,
+while the row still exists, if the instance was loaded with those fields
+deferred. Loading models costs nothing extra.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.properties.models import Property
+from . import counters
+
+User = get_user_model()
+
+USER_FLAGS = {'is_active_seller': 'users.sellers', 'is_active_broker': 'users.brokers'}
+
+
+def _read_stored(instance, fields, update_fields):
+    """Stash the stored values of the `fields` this save is about to write."""
+    instance._counter_before = {}
+    if instance._state.adding or not counters.counters_enabled():
+        return
+    fields = [
+        f for f in fields
+        if f in instance.__dict__ and (update_fields is None or f in update_fields)  # Loaded and written
+    ]
+    if fields:
+        row = type(instance)._default_manager.filter(pk=instance.pk).values(*fields).first()
+        instance._counter_before = row or {}
+
+
+def _load_deferred(instance, fields):
+    """Fetch the `fields` a deferred instance never loaded, before its row is deleted."""
+    if not counters.counters_enabled():
+        return
+    missing = [f for f in fields if f not in instance.__dict__]
+    if missing:
+        try:
+            instance.refresh_from_db(fields=missing)
+        except type(instance).DoesNotExist:
+            pass  # Already gone; the delete is a no-op for these fields
+
+
+@receiver(pre_save, sender=User)
+def read_stored_user(sender, instance, update_fields=None, **kwargs):
+    _read_stored(instance, USER_FLAGS, update_fields)
+
+
+@receiver(pre_save, sender=Property)
+def read_stored_property(sender, instance, update_fields=None, **kwargs):
+    _read_stored(instance, ['verification_status'], update_fields)
+
+
+@receiver(post_save, sender=User)
+def count_user_save(sender, instance, created, **kwargs):
+    deltas = Counter()
+    if created:
+        deltas['users.total'] += 1
+        deltas[counters.joined_key(instance.date_joined.date())] += 1
+    stored = getattr(instance, '_counter_before', {})
+    for field, key in USER_FLAGS.items():
+        if field not in instance.__dict__:
+            continue
+        before = False if created else stored.get(field)
+        after = instance.__dict__[field]
+        if before is not None and bool(before) != bool(after):
+            deltas[key] += 1 if after else -1
+    counters.adjust(deltas)
+    if created:
+        counters.prune_joined()
+
+
+@receiver(pre_delete, sender=User)
+def read_deleted_user(sender, instance, **kwargs):
+    _load_deferred(instance, ['date_joined', *USER_FLAGS])
+
+
+@receiver(post_delete, sender=User)
+def count_user_delete(sender, instance, **kwargs):
+    deltas = Counter({'users.total': -1})
+    if counters.in_joined_window(instance.date_joined.date()):  # Older day rows have been pruned
+        deltas[counters.joined_key(instance.date_joined.date())] -= 1
+    for field, key in USER_FLAGS.items():
+        if instance.__dict__.get(field):
+            deltas[key] -= 1
+    counters.adjust(deltas)
+
+
+@receiver(post_save, sender=Property)
+def count_property_save(sender, instance, created, **kwargs):
+    after = instance.__dict__.get('verification_status')
+    before = None if created else getattr(instance, '_counter_before', {}).get('verification_status')
+    deltas = Counter()
+    if created:
+        deltas['properties.total'] += 1
+        deltas[counters.property_status_key(after)] += 1
+    elif before and after and before != after:
+        deltas[counters.property_status_key(before)] -= 1
+        deltas[counters.property_status_key(after)] += 1
+    counters.adjust(deltas)
+
+
+@receiver(pre_delete, sender=Property)
+def read_deleted_property(sender, instance, **kwargs):
+    _load_deferred(instance, ['verification_status'])
+
+
+@receiver(post_delete, sender=Property)
+def count_property_delete(sender, instance, **kwargs):
+    deltas = Counter({'properties.total': -1})
+    status = instance.__dict__.get('verification_status')
+    if status:
+        deltas[counters.property_status_key(status)] -= 1
+    counters.adjust(deltas)
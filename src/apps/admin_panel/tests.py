@@ -1,3 +1,121 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_init
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.properties.models import Property
+from . import counters
+from .models import DashboardCounter
+
+User = get_user_model()
+
+
+@override_settings(ADMIN_DASHBOARD_COUNTERS=True)
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(email='seller@example.com', username='seller@example.com')
+        counters.rebuild()
+
+    def make_listing(self):
+        return Property.objects.create(
+            owner=self.owner, title='Listing', description='Flat near the station.',
+            price=Decimal('5000000'), property_type='FLAT', listing_type='SELL', address_line='Pune',
+        )
+
+    def assertCountersMatch(self):
+        self.assertEqual(counters.counter_stats(), counters.aggregate_stats())
+
+    def test_transitions_are_counted(self):
+        listing = self.make_listing()
+        listing = Property.objects.get(pk=listing.pk) # Loaded, as a moderation view would
+        listing.verification_status = 'VERIFIED'
+        listing.save(update_fields=['verification_status'])
+        listing.save() # No transition
+        self.owner.is_active_seller = True
+        self.owner.save()
+        self.assertCountersMatch()
+
+        listing.delete()
+        self.owner.delete()
+        self.assertCountersMatch()
+
+    def test_deleting_deferred_instances(self):
+        listing = self.make_listing()
+        Property.objects.filter(pk=listing.pk).update(verification_status='VERIFIED')
+        self.owner.is_active_seller = True
+        self.owner.save()
+        counters.rebuild()
+
+        Property.objects.only('id').get(pk=listing.pk).delete()
+        self.assertCountersMatch()
+        self.assertEqual(counters.counter_stats()['properties']['verified'], 0)
+
+        User.objects.only('id').get(pk=self.owner.pk).delete()
+        self.assertCountersMatch()
+
+    def test_loading_models_runs_no_counter_code(self):
+        self.assertFalse(post_init.has_listeners(Property))
+        self.assertFalse(post_init.has_listeners(User))
+
+    def test_joined_rows_are_pruned(self):
+        old_day = timezone.now().date() - timedelta(days=counters.NEW_USER_WINDOW_DAYS + 5)
+        DashboardCounter.objects.create(key=counters.joined_key(old_day), value=3)
+        old_user = User.objects.create(email='old@example.com', username='old@example.com')
+        User.objects.filter(pk=old_user.pk).update(date_joined=timezone.now() - timedelta(days=90))
+
+        self.assertFalse(DashboardCounter.objects.filter(key=counters.joined_key(old_day)).exists())
+        User.objects.get(pk=old_user.pk).delete()
+        # Deleting an old user must not recreate its (pruned) day row as a negative count
+        stale = DashboardCounter.objects.filter(
+            key__startswith=counters.JOINED_PREFIX,
+            key__lt=counters.joined_key(counters.joined_window_start()),
+        )
+        self.assertFalse(stale.exists())
+
+
+class ModerationActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(email='admin@example.com', username='admin@example.com', is_superuser=True)
+        cls.owner = User.objects.create(email='seller@example.com', username='seller@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def make_listing(self):
+        return Property.objects.create(
+            owner=self.owner, title='Listing', description='Flat near the station.',
+            price=Decimal('5000000'), property_type='FLAT', listing_type='SELL', address_line='Pune',
+        )
+
+    def test_reason_must_be_a_string(self):
+        listing = self.make_listing()
+        response = self.client.post(
+            reverse('admin-prop-action', args=[listing.pk]),
+            {'action': 'REJECT', 'reason': {'text': 'blurry'}}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('reason', response.data)
+        listing.refresh_from_db()
+        self.assertEqual(listing.verification_status, 'PENDING')
+
+    def test_bulk_item_with_bad_reason_fails_alone(self):
+        bad, good = self.make_listing(), self.make_listing()
+        response = self.client.post(reverse('admin-prop-bulk-action'), {'items': [
+            {'id': str(bad.pk), 'action': 'REJECT', 'reason': ['blurry']},
+            {'id': str(good.pk), 'action': 'REJECT', 'reason': 'Documents unreadable'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['rejected'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['results'][0]['error'], "reason must be a string")
+        self.assertEqual(
+            dict(Property.objects.values_list('pk', 'rejection_reason')),
+            {bad.pk: None, good.pk: 'Documents unreadable'},
+        )
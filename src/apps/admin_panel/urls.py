@@ -4,6 +4,7 @@ from .views import (
     AdminPropertyDetail, 
     AdminPropertyList, 
     AdminPropertyAction,
+    AdminPropertyBulkAction,
     AdminUserList,
     AdminUserAction ,
     
@@ -16,6 +17,7 @@ urlpatterns = [
     # Property Management
     path('properties/', AdminPropertyList.as_view(), name='admin-prop-list'),
     path('properties/<uuid:pk>/action/', AdminPropertyAction.as_view(), name='admin-prop-action'),
+    path('properties/bulk-action/', AdminPropertyBulkAction.as_view(), name='admin-prop-bulk-action'),
 
     # User Management
     path('users/', AdminUserList.as_view(), name='admin-user-list'),
@@ -2,13 +2,18 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions, generics
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Case, Count, Q, TextField, Value, When
 from django.utils import timezone
 from datetime import timedelta
+from collections import Counter
 
 # Import models from other apps
 from apps.properties.models import Property
+from apps.properties import cache as listing_cache
 from apps.users.models import BrokerProfile, KycVerification
+from . import counters
+from .serializers import MODERATION_STATUS, BulkModerationItemSerializer, ModerationActionSerializer
 
 User = get_user_model()
 
@@ -25,22 +30,12 @@ class AdminDashboardStats(APIView):
     permission_classes = [IsSuperAdmin]
 
     def get(self, request):
-        today = timezone.now().date()
-        last_30_days = timezone.now() - timedelta(days=30)
+        stats = counters.dashboard_stats()  # One query per table, or O(1) counter rows
 
         return Response({
-            "users": {
-                "total": User.objects.count(),
-                "sellers": User.objects.filter(is_active_seller=True).count(),
-                "brokers": User.objects.filter(is_active_broker=True).count(),
-                "new_this_month": User.objects.filter(date_joined__gte=last_30_days).count()
-            },
-            "properties": {
-                "total": Property.objects.count(),
-                "pending": Property.objects.filter(verification_status='PENDING').count(),
-                "verified": Property.objects.filter(verification_status='VERIFIED').count(),
-                "rejected": Property.objects.filter(verification_status='REJECTED').count(),
-            },
+            "users": stats["users"],
+            "properties": stats["properties"],
+            "listing_cache": listing_cache.stats(),
             "revenue_simulation": {
                 # Placeholder if you add monetization later
                 "total_deals_closed": 0 
@@ -64,7 +59,9 @@ class AdminPropertyList(generics.ListAPIView):
 
     def get_queryset(self):
         status_param = self.request.query_params.get('status', 'PENDING')
-        return Property.objects.filter(verification_status=status_param).order_by('-created_at')
+        return Property.objects.for_listing().filter(verification_status=status_param).order_by('-created_at')
+
+MODERATION_FIELDS = ['verification_status', 'rejection_reason', 'updated_at']
 
 class AdminPropertyAction(APIView):
     """
@@ -73,27 +70,119 @@ class AdminPropertyAction(APIView):
     permission_classes = [IsSuperAdmin]
 
     def post(self, request, pk):
+        serializer = ModerationActionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+        action = serializer.validated_data['action'] # 'APPROVE' or 'REJECT'
+        reason = serializer.validated_data['reason']
+
         try:
-            property_obj = Property.objects.get(pk=pk)
+            # Only the columns we touch: no need to read (or rewrite) the embedding etc.
+            property_obj = Property.objects.only('id', 'title', 'verification_status', 'rejection_reason').get(pk=pk)
         except Property.DoesNotExist:
             return Response({"error": "Property not found"}, status=404)
 
-        action = request.data.get('action') # 'APPROVE' or 'REJECT'
-        reason = request.data.get('reason', '')
-
         if action == 'APPROVE':
             property_obj.verification_status = 'VERIFIED'
             property_obj.rejection_reason = None
-            property_obj.save()
+            property_obj.save(update_fields=MODERATION_FIELDS)
+            listing_cache.bump_catalogue_version()
             return Response({"message": f"Property '{property_obj.title}' is now LIVE."})
 
-        elif action == 'REJECT':
-            property_obj.verification_status = 'REJECTED'
-            property_obj.rejection_reason = reason
-            property_obj.save()
-            return Response({"message": f"Property rejected."})
+        property_obj.verification_status = 'REJECTED'
+        property_obj.rejection_reason = reason
+        property_obj.save(update_fields=MODERATION_FIELDS)
+        listing_cache.bump_catalogue_version()
+        return Response({"message": f"Property rejected."})
+
+class AdminPropertyBulkAction(APIView):
+    """
+    Approve or Reject many properties at once.
+    Body: {"items": [{"id": "<uuid>", "action": "APPROVE"},
+                     {"id": "<uuid>", "action": "REJECT", "reason": "Documents unreadable"}]}
+
+    Valid items are applied together in one transaction with two UPDATE
+    statements (one for approvals, one for rejections with per-row reasons);
+    each item gets its own entry in "results".
+    """
+    permission_classes = [IsSuperAdmin]
+    max_items = 500
+
+    def post(self, request):
+        items = request.data.get('items')
+        if not isinstance(items, list) or not items:
+            return Response({"error": "items must be a non-empty list"}, status=400)
+        if len(items) > self.max_items:
+            return Response({"error": f"At most {self.max_items} items per request"}, status=400)
+
+        results = []
+        actions = {}  # pk -> (new status, reason)
+        for item in items:
+            result = {"id": item.get('id') if isinstance(item, dict) else None}
+            results.append(result)
+            serializer = BulkModerationItemSerializer(data=item)
+            if not serializer.is_valid():
+                result["error"] = serializer.first_error()
+                continue
+            pk, action = serializer.validated_data['id'], serializer.validated_data['action']
+            if pk in actions:
+                result["error"] = "Duplicate id"
+                continue
+            result["pk"] = pk
+            reason = serializer.validated_data['reason'] if action == 'REJECT' else None
+            actions[pk] = (MODERATION_STATUS[action], reason)
+
+        deltas = Counter()
+        with transaction.atomic():
+            # Lock the rows so the counter deltas below match what we overwrite
+            previous = dict(
+                Property.objects.select_for_update()
+                .filter(pk__in=actions)
+                .values_list('pk', 'verification_status')
+            )
+            now = timezone.now()
+            approve = [pk for pk, (new, _) in actions.items() if new == 'VERIFIED' and pk in previous]
+            reject = {pk: reason for pk, (new, reason) in actions.items() if new == 'REJECTED' and pk in previous}
+
+            if approve:
+                Property.objects.filter(pk__in=approve).update(
+                    verification_status='VERIFIED', rejection_reason=None, updated_at=now,
+                )
+            if reject:
+                Property.objects.filter(pk__in=reject).update(
+                    verification_status='REJECTED',
+                    rejection_reason=Case(
+                        *[When(pk=pk, then=Value(reason)) for pk, reason in reject.items()],
+                        output_field=TextField(),
+                    ),
+                    updated_at=now,
+                )
+
+            for pk in [*approve, *reject]:
+                old, new = previous[pk], actions[pk][0]
+                if old != new:
+                    deltas[counters.property_status_key(old)] -= 1
+                    deltas[counters.property_status_key(new)] += 1
+            counters.adjust(deltas)
+
+        if approve or reject:
+            listing_cache.bump_catalogue_version()
+
+        for result in results:
+            pk = result.pop("pk", None)
+            if pk is None:
+                continue
+            if pk not in previous:
+                result["error"] = "Property not found"
+            else:
+                result["verification_status"] = actions[pk][0]
 
-        return Response({"error": "Invalid action. Use APPROVE or REJECT"}, status=400)
+        return Response({
+            "approved": len(approve),
+            "rejected": len(reject),
+            "failed": sum(1 for r in results if "error" in r),
+            "results": results,
+        })
 
 # ==========================================
 # 3. USER MANAGEMENT (Brokers/Sellers)
@@ -148,4 +237,4 @@ class AdminPropertyDetail(generics.RetrieveAPIView):
     permission_classes = [IsSuperAdmin]
     from apps.properties.serializers import PropertySerializer
     serializer_class = PropertySerializer
-    queryset = Property.objects.all()
\ No newline at end of file
+    queryset = Property.objects.for_listing()
\ No newline at end of file
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.mandates.models import Mandate
+
+
+class Command(BaseCommand):
+    help = "Mark overdue PENDING mandates as EXPIRED in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Mandates updated per transaction.")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep sweeping every --sleep seconds instead of exiting.")
+        parser.add_argument('--sleep', type=float, default=60.0,
+                            help="Seconds between sweeps (with --loop).")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                expired = Mandate.objects.expire_overdue(options['batch_size'])
+            except Exception as exc:
+                if not options['loop']:
+                    raise
+                self.stderr.write(f"Mandate sweep failed: {exc}")
+                expired = 0
+            if expired or not options['loop']:
+                self.stdout.write(f"Expired {expired} mandates.")
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mandates', '0002_initial'),
+        ('properties', '0011_recentlyviewed_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mandate',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['expires_at'], name='mandate_pending_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mandates', '0003_mandate_pending_expiry_idx'),
+        ('properties', '0011_recentlyviewed_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mandate',
+            index=models.Index(fields=['broker', 'status', 'created_at', 'id'], name='mandate_broker_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mandate',
+            index=models.Index(fields=['seller', 'status', 'created_at', 'id'], name='mandate_seller_inbox_idx'),
+        ),
+    ]
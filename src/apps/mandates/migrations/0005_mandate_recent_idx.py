@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mandates', '0004_mandate_inbox_indexes'),
+        ('properties', '0018_embeddingqueue_next_attempt_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mandate',
+            index=models.Index(fields=['broker', 'created_at', 'id'], name='mandate_broker_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mandate',
+            index=models.Index(fields=['seller', 'created_at', 'id'], name='mandate_seller_recent_idx'),
+        ),
+    ]
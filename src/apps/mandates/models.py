@@ -1,12 +1,60 @@
 import uuid
 from datetime import timedelta
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Q, When
+from django.db.models.functions import Now
 from django.utils import timezone
 from django.conf import settings
 
 def get_expiry():
     return timezone.now() + timedelta(hours=48)
 
+class MandateQuerySet(models.QuerySet):
+    """
+    A PENDING mandate past expires_at is expired whether or not the sweeper
+    (`manage.py expire_mandates`) has rewritten its status yet, so reads go
+    through these helpers instead of trusting the stored status.
+    """
+    def overdue(self):
+        return self.filter(status='PENDING', expires_at__lte=Now())
+
+    def pending(self):
+        return self.filter(status='PENDING', expires_at__gt=Now())
+
+    def with_status(self, status):
+        if status == 'PENDING':
+            return self.pending()
+        if status == 'EXPIRED':
+            return self.filter(Q(status='EXPIRED') | Q(status='PENDING', expires_at__lte=Now()))
+        return self.filter(status=status)
+
+    def with_effective_status(self):
+        return self.annotate(effective_status=Case(
+            When(status='PENDING', expires_at__lte=Now(), then=models.Value('EXPIRED')),
+            default=F('status'),
+            output_field=models.CharField(),
+        ))
+
+    def expire_overdue(self, batch_size=1000):
+        """
+        Move overdue PENDING mandates to EXPIRED, `batch_size` rows per
+        transaction (short row locks, bounded WAL per statement). Rows another
+        sweeper has locked are skipped. Returns the number expired.
+        """
+        expired = 0
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    self.overdue()
+                    .select_for_update(skip_locked=True)
+                    .order_by('expires_at')  # Walks mandate_pending_expiry_idx
+                    .values_list('pk', flat=True)[:batch_size]
+                )
+                if ids:
+                    expired += self.model.objects.filter(pk__in=ids, status='PENDING').update(status='EXPIRED')
+            if len(ids) < batch_size:
+                return expired
+
 class Mandate(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     property = models.ForeignKey('properties.Property', on_delete=models.CASCADE)
@@ -29,3 +77,27 @@ class Mandate(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(default=get_expiry)
+
+    objects = MandateQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Inbox tabs: WHERE broker/seller = me AND status = x ORDER BY created_at DESC, id DESC
+            models.Index(fields=['broker', 'status', 'created_at', 'id'], name='mandate_broker_inbox_idx'),
+            models.Index(fields=['seller', 'status', 'created_at', 'id'], name='mandate_seller_inbox_idx'),
+            # The "All" tab (no ?status=): WHERE broker/seller = me ORDER BY created_at DESC, id DESC
+            models.Index(fields=['broker', 'created_at', 'id'], name='mandate_broker_recent_idx'),
+            models.Index(fields=['seller', 'created_at', 'id'], name='mandate_seller_recent_idx'),
+            # Only PENDING rows can become overdue; the index stays as small as the open mandates
+            models.Index(
+                fields=['expires_at'],
+                name='mandate_pending_expiry_idx',
+                condition=models.Q(status='PENDING'),
+            ),
+        ]
+
+    def get_effective_status(self):
+        # Same rule as MandateQuerySet.with_effective_status(), for an instance in hand
+        if self.status == 'PENDING' and self.expires_at <= timezone.now():
+            return 'EXPIRED'
+        return self.status
@@ -0,0 +1,40 @@
+from rest_framework import serializers
+from apps.properties.models import Property
+from .models import Mandate
+
+class MandateSerializer(serializers.ModelSerializer):
+    # Only what perform_create checks; skips loading the listing's embedding and documents
+    property = serializers.PrimaryKeyRelatedField(queryset=Property.objects.only('id', 'owner', 'verification_status'))
+    property_title = serializers.ReadOnlyField(source='property.title')
+    property_price = serializers.ReadOnlyField(source='property.price')
+    seller_name = serializers.ReadOnlyField(source='seller.full_name')
+    broker_name = serializers.ReadOnlyField(source='broker.full_name')
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Mandate
+        fields = [
+            'id', 'property', 'property_title', 'property_price',
+            'seller', 'seller_name', 'broker', 'broker_name',
+            'deal_type', 'initiated_by', 'status',
+            'created_at', 'expires_at',
+        ]
+        read_only_fields = ['seller', 'initiated_by', 'created_at', 'expires_at']
+
+    def get_status(self, obj):
+        # Overdue PENDING rows read as EXPIRED even before the sweeper reaches them
+        return getattr(obj, 'effective_status', None) or obj.get_effective_status()
+
+    def validate(self, attrs):
+        broker = attrs.get('broker')
+        if attrs.get('deal_type') == 'WITH_BROKER' and broker is None:
+            # perform_create fills in the broker only when a broker proposes on someone
+            # else's listing; the owner (even one who is also a broker) must name one
+            user = self.context['request'].user
+            if attrs['property'].owner_id == user.pk or not user.is_active_broker:
+                raise serializers.ValidationError({'broker': "Choose the broker for a WITH_BROKER mandate."})
+        if attrs.get('deal_type') == 'WITH_PLATFORM' and broker is not None:
+            raise serializers.ValidationError({'broker': "A WITH_PLATFORM mandate has no broker."})
+        if broker is not None and not broker.is_active_broker:
+            raise serializers.ValidationError({'broker': "This user is not an active broker."})
+        return attrs
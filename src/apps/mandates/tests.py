@@ -1,3 +1,209 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.properties.tests import make_listing
+from .models import Mandate
+
+User = get_user_model()
+
+
+def make_mandate(listing, broker, **fields):
+    return Mandate.objects.create(**{
+        'property': listing,
+        'seller_id': listing.owner_id,
+        'broker': broker,
+        'deal_type': 'WITH_BROKER',
+        'initiated_by': 'SELLER',
+        **fields,
+    })
+
+
+class MandateCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Lists their own homes and also works as a broker
+        cls.seller = User.objects.create(
+            email='seller@example.com', username='seller@example.com', is_active_seller=True, is_active_broker=True,
+        )
+        cls.broker = User.objects.create(email='broker@example.com', username='broker@example.com', is_active_broker=True)
+        cls.listing = make_listing(cls.seller, verification_status='VERIFIED')
+
+    def propose(self, user, **data):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(reverse('mandate-list'), {'property': self.listing.pk, 'deal_type': 'WITH_BROKER', **data})
+
+    def test_owner_must_name_the_broker(self):
+        response = self.propose(self.seller)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('broker', response.data)
+        self.assertFalse(Mandate.objects.exists())
+
+        self.assertEqual(self.propose(self.seller, broker=self.broker.pk).status_code, 201)
+
+    def test_broker_proposing_on_a_listing_is_the_broker(self):
+        response = self.propose(self.broker)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Mandate.objects.get().broker, self.broker)
+
+
+class MandateExpiryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create(email='seller@example.com', username='seller@example.com', is_active_seller=True)
+        cls.broker = User.objects.create(email='broker@example.com', username='broker@example.com', is_active_broker=True)
+        cls.listing = make_listing(cls.seller, verification_status='VERIFIED')
+
+    def mandate(self, status='PENDING', overdue=False):
+        hours = -1 if overdue else 1
+        return make_mandate(
+            self.listing, self.broker, status=status, expires_at=timezone.now() + timedelta(hours=hours),
+        )
+
+    def statuses(self, *mandates):
+        stored = dict(Mandate.objects.values_list('pk', 'status'))
+        return [stored[m.pk] for m in mandates]
+
+    def test_sweeper_expires_only_overdue_pending(self):
+        overdue = [self.mandate(overdue=True) for _ in range(3)]
+        open_ = self.mandate()
+        decided = [self.mandate(status, overdue=True) for status in ('ACCEPTED', 'REJECTED')]
+
+        # batch_size=2 forces a second batch and a final short one
+        self.assertEqual(Mandate.objects.expire_overdue(batch_size=2), 3)
+        self.assertEqual(self.statuses(*overdue), ['EXPIRED'] * 3)
+        self.assertEqual(self.statuses(open_, *decided), ['PENDING', 'ACCEPTED', 'REJECTED'])
+
+        self.assertEqual(Mandate.objects.expire_overdue(), 0)
+
+    def test_command_reports_expired_count(self):
+        self.mandate(overdue=True)
+        self.mandate()
+        out = StringIO()
+        call_command('expire_mandates', '--batch-size', '1', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Expired 1 mandates.')
+        self.assertEqual(Mandate.objects.filter(status='EXPIRED').count(), 1)
+
+    def test_overdue_reads_expired_before_the_sweep(self):
+        overdue = self.mandate(overdue=True)
+        open_ = self.mandate()
+        accepted = self.mandate('ACCEPTED', overdue=True)
+
+        self.assertEqual(overdue.get_effective_status(), 'EXPIRED')
+        effective = dict(Mandate.objects.with_effective_status().values_list('pk', 'effective_status'))
+        self.assertEqual(effective, {overdue.pk: 'EXPIRED', open_.pk: 'PENDING', accepted.pk: 'ACCEPTED'})
+        self.assertEqual(list(Mandate.objects.pending()), [open_])
+        self.assertEqual(list(Mandate.objects.with_status('EXPIRED')), [overdue])
+
+        client = APIClient()
+        client.force_authenticate(self.broker)
+        response = client.get(reverse('mandate-detail', args=[overdue.pk]))
+        self.assertEqual(response.data['status'], 'EXPIRED')
+        self.assertEqual(self.statuses(overdue), ['PENDING']) # Still unswept on disk
+
+
+class MandateInboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create(email='seller@example.com', username='seller@example.com', is_active_seller=True)
+        cls.broker = User.objects.create(email='broker@example.com', username='broker@example.com', is_active_broker=True)
+        other_broker = User.objects.create(email='other@example.com', username='other@example.com', is_active_broker=True)
+        cls.listing = make_listing(cls.seller, verification_status='VERIFIED')
+
+        now = timezone.now()
+        cls.mandates = []
+        for hours, status in enumerate(['PENDING', 'PENDING', 'PENDING', 'EXPIRED', 'ACCEPTED', 'REJECTED', 'PENDING']):
+            mandate = make_mandate(cls.listing, cls.broker, status=status)
+            # Two pairs share a created_at so the id tiebreaker decides the page boundary
+            Mandate.objects.filter(pk=mandate.pk).update(created_at=now - timedelta(hours=hours // 2))
+            cls.mandates.append(mandate)
+        cls.overdue = cls.mandates[-1]
+        Mandate.objects.filter(pk=cls.overdue.pk).update(expires_at=now - timedelta(minutes=1))
+        make_mandate(cls.listing, other_broker)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def inbox(self, user=None, **params):
+        response = self.client_for(user or self.broker).get(reverse('mandate-list'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_keyset_pages_cover_the_inbox_once(self):
+        expected = [str(pk) for pk in Mandate.objects.filter(broker=self.broker).order_by('-created_at', '-id')
+                    .values_list('pk', flat=True)]
+        client = self.client_for(self.broker)
+        pages, url = [], reverse('mandate-list') + '?page_size=3'
+        while url:
+            data = client.get(url).data
+            pages.append([row['id'] for row in data['results']])
+            url = data['next']
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+        # And back again from the last page
+        back = client.get(data['previous']).data
+        self.assertEqual([row['id'] for row in back['results']], pages[1])
+
+    def test_status_tab_pages_stay_within_the_status(self):
+        first = self.inbox(status='PENDING', page_size=2)
+        rest = self.client_for(self.broker).get(first['next']).data
+        ids = [row['id'] for row in first['results'] + rest['results']]
+        self.assertEqual(sorted(ids), sorted(str(m.pk) for m in self.mandates[:3]))
+        self.assertIsNone(rest['next'])
+
+    def test_counts_per_tab_including_all(self):
+        counts = {'ALL': 7, 'PENDING': 3, 'ACCEPTED': 1, 'REJECTED': 1, 'EXPIRED': 2}
+        self.assertEqual(self.inbox()['counts'], counts)
+        # Counts describe the whole inbox, not the current tab or page
+        self.assertEqual(self.inbox(status='ACCEPTED', page_size=1)['counts'], counts)
+        for status, count in counts.items():
+            if status != 'ALL':
+                with self.subTest(status=status):
+                    self.assertEqual(len(self.inbox(status=status)['results']), count)
+        self.assertEqual(len(self.inbox()['results']), counts['ALL'])
+
+        seller_counts = self.inbox(self.seller, role='seller')['counts']
+        self.assertEqual(seller_counts['ALL'], 8)
+
+    def test_bad_role_or_status_is_400(self):
+        client = self.client_for(self.broker)
+        self.assertEqual(client.get(reverse('mandate-list'), {'role': 'buyer'}).status_code, 400)
+        self.assertEqual(client.get(reverse('mandate-list'), {'status': 'ACTIVE'}).status_code, 400)
+
+    def test_answering_a_decided_mandate_is_409(self):
+        client = self.client_for(self.broker)
+        pending = self.mandates[0]
+        accept = reverse('mandate-accept', args=[pending.pk])
+        reject = reverse('mandate-reject', args=[pending.pk])
+
+        response = client.post(accept)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['status'], 'ACCEPTED')
+
+        for url in (accept, reject):
+            with self.subTest(url=url):
+                response = client.post(url)
+                self.assertEqual(response.status_code, 409)
+                self.assertEqual(response.data['status'], 'ACCEPTED')
+        self.assertEqual(Mandate.objects.get(pk=pending.pk).status, 'ACCEPTED')
+
+    def test_answering_an_overdue_mandate_is_409_expired(self):
+        response = self.client_for(self.broker).post(reverse('mandate-accept', args=[self.overdue.pk]))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], 'EXPIRED')
+        self.assertEqual(Mandate.objects.get(pk=self.overdue.pk).status, 'PENDING')
 
-# Create your tests here.
+    def test_only_the_counterparty_can_answer(self):
+        response = self.client_for(self.seller).post(reverse('mandate-accept', args=[self.mandates[0].pk]))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Mandate.objects.get(pk=self.mandates[0].pk).status, 'PENDING')
@@ -1,3 +1,139 @@
-from django.shortcuts import render
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from django.db.models import Count, Q
+from django.db.models.functions import Now
 
-# Create your views here.
+from apps.properties.pagination import KeysetPagination
+from .models import Mandate
+from .serializers import MandateSerializer
+
+INBOX_ROLES = ('seller', 'broker')
+STATUSES = [code for code, _ in Mandate.STATUS_CHOICES]
+
+# Columns the serializer reads: everything on the mandate plus a few from each join
+INBOX_COLUMNS = [
+    'id', 'deal_type', 'initiated_by', 'status', 'created_at', 'expires_at',
+    'property__id', 'property__title', 'property__price',
+    'seller__id', 'seller__full_name',
+    'broker__id', 'broker__full_name',
+]
+
+
+class MandatePagination(KeysetPagination):
+    """Inbox: newest first, keyset on (created_at, id) so deep pages stay index range scans."""
+    page_size = 20
+    cursor_fields = {'created_at': KeysetPagination.cursor_fields['created_at']}
+
+
+class MandateViewSet(mixins.CreateModelMixin,
+                     mixins.RetrieveModelMixin,
+                     mixins.ListModelMixin,
+                     viewsets.GenericViewSet):
+    """
+    GET  /api/mandates/?role=broker&status=PENDING   -> my inbox (+ per-status counts)
+    POST /api/mandates/                               -> propose a mandate
+    GET  /api/mandates/<id>/
+    POST /api/mandates/<id>/accept/ | /reject/        -> counterparty answers
+    """
+    serializer_class = MandateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MandatePagination
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_staff:
+            return self.for_inbox(Mandate.objects.all()) # Staff answer WITH_PLATFORM mandates
+        return self.for_inbox(Mandate.objects.filter(Q(seller=user) | Q(broker=user)))
+
+    def for_inbox(self, queryset):
+        # Property and counterparty in the same query, without the listing's embedding/search columns
+        return (
+            queryset
+            .select_related('property', 'seller', 'broker')
+            .only(*INBOX_COLUMNS)
+            .with_effective_status()
+            .order_by('-created_at')
+        )
+
+    def get_role(self):
+        default = 'broker' if self.request.user.is_active_broker else 'seller'
+        role = self.request.query_params.get('role', default)
+        if role not in INBOX_ROLES:
+            raise ValidationError({'role': "Expected 'seller' or 'broker'."})
+        return role
+
+    def list(self, request, *args, **kwargs):
+        role = self.get_role()
+        mine = Mandate.objects.filter(**{role: request.user})
+
+        queryset = self.for_inbox(mine)
+        status_filter = request.query_params.get('status')
+        if status_filter:
+            if status_filter not in STATUSES:
+                raise ValidationError({'status': f"Expected one of {', '.join(STATUSES)}."})
+            queryset = queryset.with_status(status_filter)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['counts'] = self.status_counts(mine)
+        return response
+
+    def status_counts(self, queryset):
+        """Tab badges in one pass over the role's index: COUNT(*) FILTER (...) per effective status, plus "All"."""
+        overdue = Q(status='PENDING', expires_at__lte=Now())
+        return queryset.aggregate(
+            ALL=Count('pk'),
+            PENDING=Count('pk', filter=Q(status='PENDING') & ~overdue),
+            ACCEPTED=Count('pk', filter=Q(status='ACCEPTED')),
+            REJECTED=Count('pk', filter=Q(status='REJECTED')),
+            EXPIRED=Count('pk', filter=Q(status='EXPIRED') | overdue),
+        )
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        property_obj = serializer.validated_data['property']
+
+        if property_obj.owner_id == user.pk:
+            # Seller asks a broker (or the platform) to handle their listing
+            fields = {'seller': user, 'initiated_by': 'SELLER'}
+        elif user.is_active_broker and property_obj.verification_status == 'VERIFIED':
+            # Broker offers to handle someone else's (public) listing
+            fields = {'seller_id': property_obj.owner_id, 'broker': user, 'initiated_by': 'BROKER', 'deal_type': 'WITH_BROKER'}
+        else:
+            raise PermissionDenied("Only the property owner or an active broker can propose a mandate.")
+
+        broker = fields.get('broker', serializer.validated_data.get('broker'))
+        if broker is not None and Mandate.objects.pending().filter(property=property_obj, broker=broker).exists():
+            raise ValidationError("A pending mandate for this property and broker already exists.")
+        serializer.save(**fields)
+
+    @action(detail=True, methods=['post'])
+    def accept(self, request, pk=None):
+        return self.respond(request, 'ACCEPTED')
+
+    @action(detail=True, methods=['post'])
+    def reject(self, request, pk=None):
+        return self.respond(request, 'REJECTED')
+
+    def respond(self, request, new_status):
+        mandate = self.get_object()
+        if mandate.initiated_by == 'SELLER':
+            allowed = mandate.broker_id == request.user.pk if mandate.broker_id else request.user.is_staff
+        else:
+            allowed = mandate.seller_id == request.user.pk
+        if not allowed:
+            raise PermissionDenied("Only the other party can answer this mandate.")
+
+        # Conditional UPDATE: only wins if the mandate is still PENDING and not overdue,
+        # so a double tap or a race with the other answer can't apply twice.
+        updated = Mandate.objects.pending().filter(pk=mandate.pk).update(status=new_status)
+        if not updated:
+            current = self.get_object()
+            return Response(
+                {'error': f"Mandate is already {current.effective_status.lower()}", 'status': current.effective_status},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(self.get_serializer(self.get_object()).data)
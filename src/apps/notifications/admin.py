@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    # No body: login OTP mails carry the code in it
+    fields = ('to_email', 'from_email', 'subject', 'status', 'attempts', 'next_attempt_at',
+              'expires_at', 'last_error', 'created_at', 'sent_at')
+    readonly_fields = fields
+    list_display = ('subject', 'to_email', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+
+    def has_add_permission(self, request):
+        return False
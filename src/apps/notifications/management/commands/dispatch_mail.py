@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications import outbox
+
+
+class Command(BaseCommand):
+    help = "Send queued outbound mail (OTPs etc.) in batches over a shared SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Mails per SMTP connection (default: MAIL_OUTBOX_BATCH_SIZE).")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling the outbox instead of exiting once nothing is due.")
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help="Seconds to wait between polls when nothing is due (with --loop).")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                claimed, sent, failed = outbox.dispatch(options['batch_size'])
+            except Exception as exc:
+                if not options['loop']:
+                    raise
+                self.stderr.write(f"Mail dispatch failed: {exc}")
+                time.sleep(options['sleep'])
+                continue
+            if claimed:
+                self.stdout.write(f"Dispatched {claimed} mails ({sent} sent, {failed} to retry or failed).")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications import outbox
+
+
+class Command(BaseCommand):
+    help = "Delete sent, failed and expired outbound mail older than MAIL_OUTBOX_RETENTION_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Keep finished mail for this many days (default: MAIL_OUTBOX_RETENTION_DAYS).")
+
+    def handle(self, *args, **options):
+        older_than = timedelta(days=options['days']) if options['days'] is not None else None
+        deleted = outbox.purge(older_than)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} finished mails."))
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='outboundemail',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed'), ('EXPIRED', 'Expired')], default='PENDING', max_length=10),
+        ),
+        # Mail sent before bodies were blanked still holds login codes
+        migrations.RunSQL(
+            "UPDATE notifications_outboundemail SET body = '' WHERE status <> 'PENDING'",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
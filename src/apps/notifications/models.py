@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+class OutboundEmail(models.Model):
+    """
+    A mail waiting in the outbox. Requests only INSERT a row (outbox.queue_mail);
+    `manage.py dispatch_mail` sends them over a shared SMTP connection.
+    The body is blanked once the row is SENT, FAILED or EXPIRED (it may hold a login code).
+    """
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'), # Gave up after MAIL_OUTBOX_MAX_ATTEMPTS
+        ('EXPIRED', 'Expired'), # Not sent before expires_at (e.g. an OTP past its TTL)
+    )
+
+    to_email = models.EmailField()
+    from_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now) # Also the claim lease while a worker sends it
+    last_error = models.TextField(blank=True)
+
+    expires_at = models.DateTimeField(null=True, blank=True) # Pointless to deliver after this
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The dispatcher only ever looks at pending mail that is due
+            models.Index(
+                fields=['next_attempt_at'],
+                name='outbound_email_due_idx',
+                condition=models.Q(status='PENDING'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
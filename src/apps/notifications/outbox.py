@@ -0,0 +1,155 @@
+"""
+Outbound mail queue.
+
+Views call queue_mail(), which is a single INSERT, and return straight away.
+The dispatcher (`manage.py dispatch_mail --loop`) claims due rows with
+SELECT ... FOR UPDATE SKIP LOCKED, so several dispatchers can run side by
+side. It pushes them through one SMTP connection per batch instead of a
+connect/login/quit per mail.
+
+Claiming moves next_attempt_at forward by CLAIM_LEASE, so a dispatcher that
+dies mid-batch only delays those mails; they become due again when the lease
+runs out. A failed send is retried with exponential backoff until
+MAIL_OUTBOX_MAX_ATTEMPTS, then marked FAILED.
+
+Mail queued with `expires_in` (login OTPs) is marked EXPIRED instead of sent
+once that has passed. Bodies are blanked when a row reaches SENT, FAILED or
+EXPIRED, and `manage.py purge_outbox` deletes those rows after
+MAIL_OUTBOX_RETENTION_DAYS.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+CLAIM_LEASE = timedelta(minutes=5)
+MAX_BACKOFF = timedelta(hours=1)
+
+
+def batch_size():
+    return getattr(settings, 'MAIL_OUTBOX_BATCH_SIZE', 50)
+
+
+def max_attempts():
+    return getattr(settings, 'MAIL_OUTBOX_MAX_ATTEMPTS', 5)
+
+
+def backoff(attempts):
+    """Delay before retry number `attempts` (30s, 60s, 120s, ... capped at MAX_BACKOFF)."""
+    base = timedelta(seconds=getattr(settings, 'MAIL_OUTBOX_RETRY_SECONDS', 30))
+    return min(base * 2 ** (attempts - 1), MAX_BACKOFF)
+
+
+def retention():
+    return timedelta(days=getattr(settings, 'MAIL_OUTBOX_RETENTION_DAYS', 7))
+
+
+def queue_mail(subject, message, recipient, from_email=None, expires_in=None):
+    """Queue a mail; with `expires_in` (a timedelta) it is dropped rather than sent late."""
+    return OutboundEmail.objects.create(
+        to_email=recipient,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        subject=subject,
+        body=message,
+        expires_at=timezone.now() + expires_in if expires_in is not None else None,
+    )
+
+
+def claim_batch(limit=None):
+    """Lease up to `limit` due mails to this worker; due mails past expires_at are expired instead."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:limit or batch_size()]
+        )
+        batch = [mail for mail in due if mail.expires_at is None or mail.expires_at > now]
+        expired = [mail.pk for mail in due if mail not in batch]
+        if expired:
+            OutboundEmail.objects.filter(pk__in=expired).update(status='EXPIRED', body='')
+        if batch:
+            for mail in batch:
+                mail.attempts += 1
+                mail.next_attempt_at = now + CLAIM_LEASE
+            OutboundEmail.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+
+def _record_failure(mail, exc):
+    mail.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    retry_at = timezone.now() + backoff(mail.attempts)
+    if mail.attempts >= max_attempts() or (mail.expires_at is not None and retry_at >= mail.expires_at):
+        mail.status = 'FAILED'
+        mail.body = ''
+        logger.error("Giving up on mail %s to %s: %s", mail.pk, mail.to_email, mail.last_error)
+    else:
+        mail.next_attempt_at = retry_at
+    mail.save(update_fields=['status', 'body', 'last_error', 'next_attempt_at'])
+
+
+def send_batch(batch, connection=None):
+    """Send claimed mails over one connection. Returns (sent, failed)."""
+    if not batch:
+        return 0, 0
+    connection = connection or get_connection(fail_silently=False)
+    sent = failed = 0
+    sent_ids = []
+    try:
+        connection.open()
+        for mail in batch:
+            message = EmailMessage(
+                subject=mail.subject,
+                body=mail.body,
+                from_email=mail.from_email,
+                to=[mail.to_email],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                _record_failure(mail, exc)
+                failed += 1
+                # The server may have dropped us; reconnect for the rest of the batch
+                connection.close()
+                connection.open()
+            else:
+                sent_ids.append(mail.pk)
+                sent += 1
+    except Exception as exc:
+        # Could not (re)connect: everything not yet sent goes back for a retry
+        for mail in batch[sent + failed:]:
+            _record_failure(mail, exc)
+            failed += 1
+    finally:
+        if sent_ids:
+            OutboundEmail.objects.filter(pk__in=sent_ids).update(
+                status='SENT', sent_at=timezone.now(), last_error='', body='',
+            )
+        connection.close()
+    return sent, failed
+
+
+def dispatch(limit=None):
+    """Claim and send one batch. Returns (claimed, sent, failed)."""
+    batch = claim_batch(limit)
+    sent, failed = send_batch(batch)
+    return len(batch), sent, failed
+
+
+def purge(older_than=None):
+    """Delete finished mail (SENT, FAILED, EXPIRED) created more than `older_than` ago."""
+    cutoff = timezone.now() - (older_than if older_than is not None else retention())
+    deleted, _ = (
+        OutboundEmail.objects.exclude(status='PENDING')
+        .filter(created_at__lt=cutoff)
+        .delete()
+    )
+    return deleted
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from . import outbox
+from .models import OutboundEmail
+
+
+class OutboxTests(TestCase):
+    def queue(self, **kwargs):
+        return outbox.queue_mail('Your SaudaPakka Login OTP', 'Your OTP is: 123456', 'buyer@example.com', **kwargs)
+
+    def test_sent_mail_keeps_no_body(self):
+        queued = self.queue()
+        self.assertEqual(outbox.dispatch(), (1, 1, 0))
+        self.assertEqual(mail.outbox[0].body, 'Your OTP is: 123456')
+
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.body), ('SENT', ''))
+
+    def test_expired_mail_is_not_sent(self):
+        queued = self.queue(expires_in=timedelta(minutes=5))
+        OutboundEmail.objects.filter(pk=queued.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(outbox.dispatch(), (0, 0, 0))
+        self.assertEqual(mail.outbox, [])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.body), ('EXPIRED', ''))
+
+    def test_retry_after_expiry_gives_up(self):
+        queued = self.queue(expires_in=timedelta(seconds=20))  # Shorter than the first backoff
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')), \
+                self.assertLogs('apps.notifications.outbox', 'ERROR'):
+            self.assertEqual(outbox.dispatch(), (1, 0, 1))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.body), ('FAILED', ''))
+
+    def test_purge_keeps_pending_and_recent_mail(self):
+        old = timezone.now() - timedelta(days=30)
+        pending, recent, stale = self.queue(), self.queue(), self.queue()
+        OutboundEmail.objects.filter(pk=recent.pk).update(status='SENT')
+        OutboundEmail.objects.filter(pk__in=[pending.pk, stale.pk]).update(created_at=old)
+        OutboundEmail.objects.filter(pk=stale.pk).update(status='EXPIRED')
+
+        self.assertEqual(outbox.purge(), 1)
+        self.assertEqual(set(OutboundEmail.objects.values_list('pk', flat=True)), {pending.pk, recent.pk})
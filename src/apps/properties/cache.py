@@ -0,0 +1,105 @@
+"""
+Response cache for public listing queries.
+
+Keys are built from the normalised query string (only parameters that change
+the result, sorted) plus a catalogue version. Anything that changes what the
+public can see calls ``bump_catalogue_version()``; every existing key then
+points at a version nobody asks for any more and simply ages out, so there is
+no need to find and delete individual entries.
+
+Pages are only cached on an in-memory backend (Redis, memcached, LocMem in
+dev). On DatabaseCache a hit costs more queries than building the page, so
+enabled() is False there and the views go straight to the database. Hits and
+misses are counted per process, so reads never write to the cache.
+"""
+import hashlib
+import threading
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+
+VERSION_KEY = 'listings:catalogue-version'
+
+_lookups = Counter()  # 'hits' / 'misses' in this process
+_lookups_lock = threading.Lock()
+
+# Query parameters that affect a listing response; anything else is ignored
+CACHE_PARAMS = (
+    'price__gte', 'price__lte', 'property_type', 'listing_type',
+    'search', 'ordering', 'near', 'radius_km', 'bbox',
+    'cursor', 'page_size', 'fields', 'view',
+)
+
+
+def get_cache():
+    return caches[getattr(settings, 'LISTINGS_CACHE_ALIAS', 'default')]
+
+
+def enabled():
+    """Whether listing pages are worth caching on the configured backend."""
+    return not isinstance(get_cache(), DatabaseCache)
+
+
+def catalogue_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalogue_version():
+    """Call whenever the set or content of VERIFIED listings changes."""
+    cache = get_cache()
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:  # Key missing or evicted
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.incr(VERSION_KEY)
+    # Some backends (DatabaseCache) reset the expiry to TIMEOUT on incr; the version must never expire
+    cache.touch(VERSION_KEY, None)
+    return version
+
+
+def make_key(prefix, request, scope='public', params=CACHE_PARAMS):
+    params = sorted(
+        (name, value)
+        for name in params
+        for value in request.query_params.getlist(name)
+        if value != ''
+    )
+    # Responses contain absolute URLs (images, next/previous), so the host is part of the key
+    raw = f'{request.scheme}://{request.get_host()}{request.path}?{urlencode(params)}'
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return f'listings:{prefix}:v{catalogue_version()}:{scope}:{digest}'
+
+
+def lookup(key):
+    data = get_cache().get(key)
+    with _lookups_lock:
+        _lookups['hits' if data is not None else 'misses'] += 1
+    return data
+
+
+def store(key, data, timeout=None):
+    if timeout is None:
+        timeout = getattr(settings, 'LISTINGS_CACHE_TTL', 300)
+    get_cache().set(key, data, timeout)
+
+
+def stats():
+    """Hit rate of this process's lookups, and the shared catalogue version."""
+    with _lookups_lock:
+        hits, misses = _lookups['hits'], _lookups['misses']
+    total = hits + misses
+    return {
+        'enabled': enabled(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+        'catalogue_version': catalogue_version(),
+    }
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def check_listings_cache(app_configs, **kwargs):
+    """The catalogue version must be shared, or a bump only reaches the worker that made it."""
+    alias = getattr(settings, 'LISTINGS_CACHE_ALIAS', 'default')
+    if settings.DEBUG or not isinstance(caches[alias], LocMemCache):
+        return []
+    return [Error(
+        f"LISTINGS_CACHE_ALIAS {alias!r} is a per-process LocMemCache.",
+        hint="Other workers would keep serving listing pages after the catalogue changes; "
+             "use a shared cache backend (database or Redis).",
+        id='properties.E001',
+    )]
@@ -0,0 +1,228 @@
+"""
+Background embedding of listing text.
+
+Saving a listing only records its id in ``EmbeddingQueue`` (see signals.py);
+``manage.py embed_properties`` drains the queue in batches so the request
+that created/edited the listing never waits on the embedder.
+
+Claiming a job leases it (next_attempt_at moves forward by CLAIM_LEASE) and
+the job is only deleted once its vector is written, so a worker that dies
+mid-batch just delays those listings. A listing that fails to embed gets
+attempts/last_error bumped and waits RETRY_DELAY * attempts; after
+MAX_ATTEMPTS it stays in the queue, unclaimed, until the listing is edited.
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+from pgvector.django import VectorField
+
+from .embeddings import EMBEDDING_DIMENSIONS, get_embedder
+from .fields import HalfVectorField
+from .models import EmbeddingQueue, Property, compact_embeddings
+
+logger = logging.getLogger(__name__)
+
+TEXT_FIELDS = ('title', 'description', 'address_line')
+MAX_ATTEMPTS = 5
+CLAIM_LEASE = timedelta(minutes=10)
+RETRY_DELAY = timedelta(minutes=1)
+
+
+def get_batch_size():
+    return getattr(settings, 'PROPERTY_EMBEDDING_BATCH_SIZE', 64)
+
+
+def embedding_text(prop):
+    return '\n'.join(getattr(prop, field) or '' for field in TEXT_FIELDS)
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def enqueue(property_ids):
+    # An edit restarts a queued (or leased) job, so the worker holding the old
+    # text won't delete it when done; see finish_jobs()
+    EmbeddingQueue.objects.bulk_create(
+        [EmbeddingQueue(property_id=pk) for pk in property_ids],
+        update_conflicts=True,
+        unique_fields=['property'],
+        update_fields=['enqueued_at', 'next_attempt_at', 'attempts'],
+    )
+
+
+def embed_properties(properties, embedder=None):
+    """
+    Embed the given listings and write the vectors back in one bulk UPDATE.
+    Listings whose text hash matches the last embedded text are skipped.
+    Returns the number of listings updated.
+    """
+    pending = []
+    for prop in properties:
+        text = embedding_text(prop)
+        digest = text_hash(text)
+        if digest != prop.embedding_text_hash:
+            pending.append((prop, text, digest))
+    if not pending:
+        return 0
+
+    embedder = embedder or get_embedder()
+    vectors = embedder.embed([text for _, text, _ in pending])
+    compact = compact_embeddings()
+    for (prop, _, digest), vector in zip(pending, vectors):
+        prop.embedding, prop.embedding_half = (None, vector) if compact else (vector, None)
+        prop.embedding_text_hash = digest
+
+    changed = [prop for prop, _, _ in pending]
+    Property.objects.bulk_update(changed, ['embedding', 'embedding_half', 'embedding_text_hash'])
+    return len(changed)
+
+
+def _load(property_ids):
+    return list(Property.objects.filter(pk__in=property_ids).only('id', 'embedding_text_hash', *TEXT_FIELDS))
+
+
+def claim_jobs(batch_size):
+    """
+    Lease up to ``batch_size`` due jobs to this worker. SKIP LOCKED lets
+    several workers run side by side; the lease keeps the others off these
+    jobs until they are finished or the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            EmbeddingQueue.objects.select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now, attempts__lt=MAX_ATTEMPTS)
+            .order_by('enqueued_at')[:batch_size]
+        )
+        EmbeddingQueue.objects.filter(pk__in=[job.pk for job in jobs]).update(next_attempt_at=now + CLAIM_LEASE)
+    return jobs
+
+
+def finish_jobs(jobs):
+    """Delete embedded jobs, except those re-queued (edited again) since they were claimed."""
+    if not jobs:
+        return
+    unchanged = Q()
+    for job in jobs:
+        unchanged |= Q(pk=job.pk, enqueued_at=job.enqueued_at)
+    EmbeddingQueue.objects.filter(unchanged).delete()
+
+
+def _record_failure(job, exc):
+    job.attempts += 1
+    job.last_error = f"{type(exc).__name__}: {exc}"[:1000]
+    job.next_attempt_at = timezone.now() + RETRY_DELAY * job.attempts
+    if job.attempts >= MAX_ATTEMPTS:
+        logger.error("Giving up on embedding listing %s: %s", job.property_id, job.last_error)
+    EmbeddingQueue.objects.filter(pk=job.pk, enqueued_at=job.enqueued_at).update(
+        attempts=job.attempts, last_error=job.last_error, next_attempt_at=job.next_attempt_at,
+    )
+
+
+def _embed_each(properties, embedder):
+    """Embed listings one at a time. Returns (updated, {property_id: exception})."""
+    updated, errors = 0, {}
+    for prop in properties:
+        try:
+            updated += embed_properties([prop], embedder)
+        except Exception as exc:
+            errors[prop.pk] = exc
+    return updated, errors
+
+
+def process_queue_batch(batch_size=None, embedder=None):
+    """
+    Embed one batch from the queue. Returns (claimed, updated, failed).
+
+    If the batch call fails, its listings are embedded one by one so a single
+    bad listing doesn't hold back the others. Raises only when every listing
+    failed (the embedder itself is likely down), after recording the failures.
+    """
+    jobs = claim_jobs(batch_size or get_batch_size())
+    if not jobs:
+        return 0, 0, 0
+
+    properties = _load([job.property_id for job in jobs])
+    try:
+        updated, errors = embed_properties(properties, embedder), {}
+    except Exception as exc:
+        if len(properties) > 1:
+            updated, errors = _embed_each(properties, embedder)
+        else:
+            updated, errors = 0, {prop.pk: exc for prop in properties}
+
+    finish_jobs([job for job in jobs if job.property_id not in errors])
+    for job in jobs:
+        if job.property_id in errors:
+            _record_failure(job, errors[job.property_id])
+
+    if errors and len(errors) == len(jobs):
+        raise next(iter(errors.values()))
+    return len(jobs), updated, len(errors)
+
+
+def _backfill_chunk(property_ids):
+    try:
+        return embed_properties(_load(property_ids))
+    finally:
+        connection.close()  # Each worker thread has its own connection
+
+
+def backfill(batch_size=None, workers=1, missing_only=False):
+    """
+    Embed the existing catalogue, walking it in primary key order and handing
+    batches to ``workers`` threads. Unchanged listings are skipped by hash, so
+    it is safe to re-run. Returns the number of listings updated.
+    """
+    batch_size = batch_size or get_batch_size()
+    queryset = Property.objects.order_by('pk')
+    if missing_only:
+        queryset = queryset.filter(embedding__isnull=True, embedding_half__isnull=True)
+
+    def chunks():
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            ids = list(page.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return
+            last_pk = ids[-1]
+            yield ids
+
+    if workers <= 1:
+        return sum(embed_properties(_load(ids)) for ids in chunks())
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(_backfill_chunk, chunks()))
+
+
+def convert_storage(batch_size=1000):
+    """
+    Move stored vectors into the column PROPERTY_EMBEDDING_COMPACT selects, in SQL
+    (a cast, no re-embedding), batch by batch. Returns the number of listings moved.
+    """
+    if compact_embeddings():
+        source, values = 'embedding', {
+            'embedding_half': Cast('embedding', HalfVectorField(dimensions=EMBEDDING_DIMENSIONS)), 'embedding': None,
+        }
+    else:
+        source, values = 'embedding_half', {
+            'embedding': Cast('embedding_half', VectorField(dimensions=EMBEDDING_DIMENSIONS)), 'embedding_half': None,
+        }
+    moved = 0
+    while True:
+        ids = list(
+            Property.objects.filter(**{f'{source}__isnull': False})
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return moved
+        moved += Property.objects.filter(pk__in=ids).update(**values)
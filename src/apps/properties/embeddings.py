@@ -0,0 +1,66 @@
+"""
+Text embedders for semantic listing search.
+
+The embedder in use is chosen by ``settings.PROPERTY_EMBEDDER`` (a dotted
+path). Any class implementing ``BaseEmbedder.embed`` works, so a hosted model
+can be swapped in without touching the views. The default ``HashingEmbedder``
+is deterministic and needs no network, which keeps dev and tests offline.
+"""
+import hashlib
+import re
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+EMBEDDING_DIMENSIONS = 1536  # Property.embedding and its ANN index are built from this
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class BaseEmbedder:
+    dimensions = EMBEDDING_DIMENSIONS
+
+    def embed(self, texts):
+        """Return one vector (list/ndarray of ``dimensions`` floats) per text."""
+        raise NotImplementedError
+
+    def embed_one(self, text):
+        return self.embed([text])[0]
+
+
+class HashingEmbedder(BaseEmbedder):
+    """
+    Feature-hashing embedder: every word and word pair is hashed to a signed
+    slot in the vector, which is then L2-normalised. Texts sharing words end up
+    close in cosine distance. Good enough for dev and tests, not a substitute
+    for a trained model.
+    """
+
+    def embed(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        tokens = _TOKEN_RE.findall((text or '').lower())
+        features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            slot = int.from_bytes(digest[:4], 'little') % self.dimensions
+            vector[slot] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+
+
+@lru_cache(maxsize=None)
+def _load_embedder(path):
+    return import_string(path)()
+
+
+def get_embedder():
+    return _load_embedder(getattr(settings, 'PROPERTY_EMBEDDER', 'apps.properties.embeddings.HashingEmbedder'))
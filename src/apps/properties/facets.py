@@ -0,0 +1,101 @@
+"""
+Filter sidebar counts: listings per property_type, per listing_type and per
+price bucket, plus the price range, for the current filters.
+
+Each facet ignores its own filter and applies all the others (choosing
+?property_type=FLAT still shows how many VILLAs there are), so every number
+is a COUNT(*) FILTER (WHERE ...) over the same rows. The whole response is
+one aggregate query, however many facet values there are.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Max, Min, Q
+from rest_framework.exceptions import ValidationError
+
+from .models import Property
+
+LAKH = 100_000
+CRORE = 100 * LAKH
+
+# (low, high) in rupees; high=None is open-ended
+SALE_PRICE_BUCKETS = [
+    (0, 25 * LAKH), (25 * LAKH, 50 * LAKH), (50 * LAKH, CRORE),
+    (CRORE, 2 * CRORE), (2 * CRORE, 5 * CRORE), (5 * CRORE, None),
+]
+# Monthly rents
+RENT_PRICE_BUCKETS = [
+    (0, 10_000), (10_000, 20_000), (20_000, 40_000),
+    (40_000, 75_000), (75_000, None),
+]
+
+# Query parameters the facets are computed from (cache.make_key normalises on these)
+FACET_PARAMS = (
+    'price__gte', 'price__lte', 'property_type', 'listing_type',
+    'search', 'near', 'radius_km', 'bbox',
+)
+
+
+def _price(params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        return Decimal(raw)
+    except InvalidOperation:
+        raise ValidationError({name: "Enter a number."})
+
+
+def _choice(params, name, choices):
+    value = params.get(name)
+    if value and value not in dict(choices):
+        raise ValidationError({name: f"Expected one of {', '.join(dict(choices))}."})
+    return value
+
+
+def price_buckets(listing_type):
+    return RENT_PRICE_BUCKETS if listing_type == 'RENT' else SALE_PRICE_BUCKETS
+
+
+def compute(queryset, params):
+    """
+    Facet counts for `queryset` (visibility, search and geo filters already
+    applied) under the property_type/listing_type/price filters in `params`.
+    """
+    property_type = _choice(params, 'property_type', Property.PROPERTY_TYPES)
+    listing_type = _choice(params, 'listing_type', Property.LISTING_TYPES)
+    price_gte, price_lte = _price(params, 'price__gte'), _price(params, 'price__lte')
+
+    type_q = Q(property_type=property_type) if property_type else Q()
+    listing_q = Q(listing_type=listing_type) if listing_type else Q()
+    price_q = Q()
+    if price_gte is not None:
+        price_q &= Q(price__gte=price_gte)
+    if price_lte is not None:
+        price_q &= Q(price__lte=price_lte)
+
+    buckets = price_buckets(listing_type)
+    aggregates = {
+        'total': Count('pk', filter=type_q & listing_q & price_q),
+        # The price facet ignores the price filter, like the others ignore theirs
+        'price_min': Min('price', filter=type_q & listing_q),
+        'price_max': Max('price', filter=type_q & listing_q),
+    }
+    for code, _ in Property.PROPERTY_TYPES:
+        aggregates[f'property_type:{code}'] = Count('pk', filter=Q(property_type=code) & listing_q & price_q)
+    for code, _ in Property.LISTING_TYPES:
+        aggregates[f'listing_type:{code}'] = Count('pk', filter=Q(listing_type=code) & type_q & price_q)
+    for i, (low, high) in enumerate(buckets):
+        bucket_q = Q(price__gte=low) if high is None else Q(price__gte=low, price__lt=high)
+        aggregates[f'price:{i}'] = Count('pk', filter=bucket_q & type_q & listing_q)
+
+    row = queryset.aggregate(**aggregates)
+    return {
+        'total': row['total'],
+        'property_type': {code: row[f'property_type:{code}'] for code, _ in Property.PROPERTY_TYPES},
+        'listing_type': {code: row[f'listing_type:{code}'] for code, _ in Property.LISTING_TYPES},
+        'price': [
+            {'min': low, 'max': high, 'count': row[f'price:{i}']}
+            for i, (low, high) in enumerate(buckets)
+        ],
+        'price_range': {'min': row['price_min'], 'max': row['price_max']},
+    }
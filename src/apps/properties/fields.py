@@ -0,0 +1,14 @@
+from pgvector.django import VectorField
+
+
+class HalfVectorField(VectorField):
+    """
+    pgvector's ``halfvec`` (2-byte floats, pgvector >= 0.7). Same text format
+    as ``vector``, so VectorField's conversions apply unchanged. Used for the
+    Property.embedding_half column (compact storage) and to cast
+    Property.embedding for the default half-precision ANN index.
+    """
+    def db_type(self, connection):
+        if self.dimensions is None:
+            return 'halfvec'
+        return f'halfvec({self.dimensions})'
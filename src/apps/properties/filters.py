@@ -0,0 +1,136 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from . import geo
+
+MAX_RADIUS_KM = 200
+SEARCH_CONFIG = 'simple' # Must match the search_vector trigger (migration 0008)
+
+_SEARCH_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _parse_floats(raw, count, param):
+    try:
+        values = [float(v) for v in raw.split(',')]
+    except ValueError:
+        values = []
+    if len(values) != count:
+        raise ValidationError({param: f"Expected {count} comma separated numbers."})
+    return values
+
+
+def _check_lat_lng(lat, lng, param):
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValidationError({param: "Latitude must be within ±90 and longitude within ±180."})
+
+
+def _geohash_q(cells):
+    q = Q()
+    for cell in cells:
+        q |= Q(geohash__startswith=cell)
+    return q
+
+
+def haversine_km(latitude, longitude):
+    """Database expression for the great-circle distance (km) from a point."""
+    lat1, lng1 = Radians(F('latitude')), Radians(F('longitude'))
+    lat2, lng2 = Radians(latitude), Radians(longitude)
+    a = (
+        Power(Sin((lat1 - lat2) / 2), 2)
+        + Cos(lat1) * Cos(lat2) * Power(Sin((lng1 - lng2) / 2), 2)
+    )
+    return 2 * geo.EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+class GeoFilterBackend(filters.BaseFilterBackend):
+    """
+    Map search on listings.
+
+    ?near=<lat>,<lng>&radius_km=<km>
+        Listings within the radius, nearest first (unless ?ordering is given).
+        Each result gets a ``distance_km`` annotation.
+    ?bbox=<min_lat>,<min_lng>,<max_lat>,<max_lng>
+        Listings inside the visible map rectangle.
+
+    Both narrow the candidates with geohash prefixes first so Postgres can use
+    ``property_geohash_idx``, then apply the exact lat/lng check.
+    """
+    default_radius_km = 5
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get('bbox'):
+            min_lat, min_lng, max_lat, max_lng = _parse_floats(params['bbox'], 4, 'bbox')
+            _check_lat_lng(min_lat, min_lng, 'bbox')
+            _check_lat_lng(max_lat, max_lng, 'bbox')
+            if min_lat > max_lat or min_lng > max_lng:
+                raise ValidationError({'bbox': "Expected min_lat,min_lng,max_lat,max_lng."})
+
+            cells = geo.bbox_cells(min_lat, min_lng, max_lat, max_lng)
+            if cells:
+                queryset = queryset.filter(_geohash_q(cells))
+            queryset = queryset.filter(
+                latitude__range=(min_lat, max_lat),
+                longitude__range=(min_lng, max_lng),
+            )
+
+        if params.get('near'):
+            lat, lng = _parse_floats(params['near'], 2, 'near')
+            _check_lat_lng(lat, lng, 'near')
+            try:
+                radius_km = float(params.get('radius_km', self.default_radius_km))
+            except ValueError:
+                raise ValidationError({'radius_km': "Must be a number."})
+            if not 0 < radius_km <= MAX_RADIUS_KM:
+                raise ValidationError({'radius_km': f"Must be between 0 and {MAX_RADIUS_KM}."})
+
+            cells = geo.radius_cells(lat, lng, radius_km)
+            if cells:
+                queryset = queryset.filter(_geohash_q(cells))
+            d_lat, d_lng = geo.km_to_degrees(lat, radius_km)
+            queryset = queryset.filter(
+                latitude__range=(lat - d_lat, lat + d_lat),
+                longitude__range=(lng - d_lng, lng + d_lng),
+            ).annotate(
+                distance_km=haversine_km(lat, lng)
+            ).filter(distance_km__lte=radius_km)
+
+            if not params.get('ordering'):
+                queryset = queryset.order_by('distance_km', 'id')
+
+        return queryset
+
+
+class ListingSearchFilter(filters.SearchFilter):
+    """
+    ?search= over the weighted ``search_vector`` column (GIN indexed).
+
+    Every word must match, as a prefix ("ban" finds "Baner"), anywhere in
+    title, address or description. Results are ranked with title hits above
+    address hits above description hits, unless ?ordering= or ?near= asks for
+    a different order.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        words = [
+            word.lower()
+            for term in self.get_search_terms(request)
+            for word in _SEARCH_TOKEN_RE.findall(term)
+        ]
+        if not words:
+            return queryset
+
+        # \w+ tokens can't carry tsquery operators, so building a raw query is safe
+        query = SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=SEARCH_CONFIG)
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+        if not request.query_params.get('ordering') and not request.query_params.get('near'):
+            queryset = queryset.order_by('-search_rank', '-id')
+        return queryset
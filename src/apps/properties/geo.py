@@ -0,0 +1,114 @@
+"""
+Geohash helpers for map search.
+
+Every listing stores the geohash of its coordinates in ``Property.geohash``.
+A geohash is a prefix code: all points inside a cell share the cell's prefix,
+so "which listings are inside these cells" becomes a handful of
+``geohash LIKE 'tdr1%'`` range scans on a plain btree index instead of a
+full table scan over latitude/longitude.
+"""
+import math
+
+GEOHASH_PRECISION = 9          # ~5m x 5m cells, plenty for a listing pin
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+MAX_BBOX_CELLS = 32            # Upper bound on LIKE prefixes for a bbox query
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate into a geohash string of the given length."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Return (lat_degrees, lng_degrees) covered by one cell of this precision."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def _clamp_lat(lat):
+    return max(-90.0, min(90.0, lat))
+
+
+def _wrap_lng(lng):
+    return ((lng + 180.0) % 360.0) - 180.0
+
+
+def km_to_degrees(latitude, km):
+    """Return (lat_degrees, lng_degrees) spanned by ``km`` around a latitude."""
+    d_lat = km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+    d_lng = km / (KM_PER_DEGREE_LAT * cos_lat)
+    return d_lat, min(d_lng, 180.0)
+
+
+def radius_cells(latitude, longitude, radius_km, max_cells=MAX_BBOX_CELLS):
+    """
+    Geohash prefixes whose union covers the circle around a point.
+
+    These are the bbox_cells() of the circle's bounding box, so the finest
+    precision that needs at most ``max_cells`` prefixes: a 5 km radius gets
+    ~5 km cells rather than one coarse cell and its neighbours. Returns an
+    empty list when there is no useful cover (huge radius, or a circle that
+    crosses the antimeridian); callers then rely on the lat/lng range alone.
+    """
+    d_lat, d_lng = km_to_degrees(latitude, radius_km)
+    min_lng, max_lng = longitude - d_lng, longitude + d_lng
+    if min_lng < -180.0 or max_lng > 180.0:
+        return []
+    return bbox_cells(_clamp_lat(latitude - d_lat), min_lng, _clamp_lat(latitude + d_lat), max_lng, max_cells)
+
+
+def bbox_cells(min_lat, min_lng, max_lat, max_lng, max_cells=MAX_BBOX_CELLS):
+    """
+    Geohash prefixes whose union covers a bounding box.
+
+    Uses the finest precision that needs no more than ``max_cells`` prefixes.
+    Returns an empty list for boxes so large that geohash pruning would not
+    help; the lat/lng range filter alone handles those.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lng = cell_size(precision)
+        rows = math.floor(max_lat / cell_lat) - math.floor(min_lat / cell_lat) + 1
+        cols = math.floor(max_lng / cell_lng) - math.floor(min_lng / cell_lng) + 1
+        if rows * cols > max_cells:
+            continue
+
+        first_row = math.floor(min_lat / cell_lat)
+        first_col = math.floor(min_lng / cell_lng)
+        cells = set()
+        for row in range(rows):
+            # Encode the centre of each cell so float rounding at the edges
+            # can never land us in the neighbouring cell.
+            lat = _clamp_lat((first_row + row + 0.5) * cell_lat)
+            for col in range(cols):
+                lng = _wrap_lng((first_col + col + 0.5) * cell_lng)
+                cells.add(encode(lat, lng, precision))
+        return sorted(cells)
+    return []
@@ -0,0 +1,181 @@
+"""
+Resized copies of listing photos.
+
+Sellers upload straight from their phones (often 8-12 MB, 4000px+ JPEGs with
+GPS in the EXIF). Each upload is turned into thumb/card/full derivatives in
+WebP and JPEG, EXIF-rotated and with all metadata dropped, so list screens
+never download the original. The original itself is rewritten without its
+metadata too; until then (processing_status PENDING/FAILED) the API doesn't
+show its URL.
+
+The work runs outside the web process: `manage.py process_property_images
+--loop` polls for PENDING images, so nothing is lost on a web restart and
+resizing doesn't compete with requests. PROPERTY_IMAGES_INLINE=True processes
+uploads in the request instead (dev/tests).
+
+Workers claim images with SELECT ... FOR UPDATE SKIP LOCKED and hold them for
+CLAIM_LEASE, so two workers never process the same image and one that dies
+only delays it. New files (the stripped original, derivatives) are written
+under fresh names and swapped in with one UPDATE; the files they replace are
+deleted afterwards. A crash at any point leaves the previous files in place.
+"""
+import io
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import cache as listing_cache
+from .models import Property, PropertyImage
+
+logger = logging.getLogger(__name__)
+
+CLAIM_LEASE = timedelta(minutes=10)
+
+# Longest edge in pixels; images are never upscaled
+DERIVATIVE_SIZES = {
+    'thumb': 200,
+    'card': 640,
+    'full': 1600,
+}
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def derivative_path(image, name, ext):
+    return f'properties/derivatives/{image.pk}/{name}.{ext}'
+
+
+def _to_rgb(img):
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def generate_derivatives(image_id):
+    """Build every derivative for one claimed PropertyImage (see claim()) and record the result."""
+    image = PropertyImage.objects.filter(pk=image_id).first()
+    if image is None:
+        return None
+
+    written = []  # New files, removed again if anything fails
+    try:
+        with image.image.open('rb') as fh:
+            original = Image.open(fh)
+            original_format = original.format
+            icc_profile = original.info.get('icc_profile')
+            original = ImageOps.exif_transpose(original)  # Apply the phone's rotation before dropping EXIF
+            source = _to_rgb(original)
+
+        derivatives = {}
+        for name, size in DERIVATIVE_SIZES.items():
+            resized = source.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            entry = {'width': resized.width, 'height': resized.height}
+            for ext, (fmt, options) in FORMATS.items():
+                buffer = io.BytesIO()
+                resized.save(buffer, fmt, **options)  # No exif= argument: metadata is not written
+                # A taken name gets a suffix: the current derivative stays until the swap below
+                entry[ext] = default_storage.save(derivative_path(image, name, ext), ContentFile(buffer.getvalue()))
+                written.append(entry[ext])
+            derivatives[name] = entry
+
+        image_name = image.image.name
+        if not image.original_stripped:
+            image_name = strip_original(image, original, original_format, icc_profile)
+            written.append(image_name)
+    except Exception:
+        logger.exception("Could not process property image %s", image_id)
+        for name in written:
+            default_storage.delete(name)
+        # A READY image keeps its previous files; anything else is hidden until reprocessed
+        PropertyImage.objects.filter(pk=image_id).exclude(processing_status='READY').update(processing_status='FAILED')
+        PropertyImage.objects.filter(pk=image_id).update(claimed_until=None)
+        return None
+
+    # update() rather than save(): doesn't fire post_save, so this isn't scheduled again
+    PropertyImage.objects.filter(pk=image_id).update(
+        image=image_name,
+        original_stripped=True,
+        width=source.width,
+        height=source.height,
+        derivatives=derivatives,
+        processing_status='READY',
+        claimed_until=None,
+    )
+    # Only now that the row points at the new files can the old ones go
+    if image_name != image.image.name:
+        default_storage.delete(image.image.name)
+    delete_derivatives(image, keep=written)
+    if Property.objects.filter(pk=image.property_id, verification_status='VERIFIED').exists():
+        listing_cache.bump_catalogue_version()  # Cached public pages still have no srcset for it
+    return derivatives
+
+
+def strip_original(image, img, fmt, icc_profile=None):
+    """
+    Write the uploaded picture (rotated, same format) again without EXIF/GPS, as
+    a new file next to the original. Returns its storage name; the caller swaps it in.
+    """
+    options = {'icc_profile': icc_profile} if icc_profile else {}
+    if fmt == 'MPO':  # Multi-picture JPEGs from some phones; keep the main picture
+        fmt = 'JPEG'
+    if fmt == 'JPEG':
+        options['quality'] = 95
+    buffer = io.BytesIO()
+    # Pillow writes no EXIF/XMP/text chunks unless they are passed in
+    img.save(buffer, fmt or 'PNG', **options)
+    return default_storage.save(image.image.name, ContentFile(buffer.getvalue()))
+
+
+def delete_derivatives(image, keep=()):
+    for entry in (image.derivatives or {}).values():
+        for ext in FORMATS:
+            if entry.get(ext) and entry[ext] not in keep:
+                default_storage.delete(entry[ext])
+
+
+def process_in_worker(image_id):
+    try:
+        return generate_derivatives(image_id)
+    finally:
+        connection.close()  # Worker threads open their own DB connection
+
+
+def schedule(image_id):
+    """Called once an upload is committed; the image worker picks it up unless PROPERTY_IMAGES_INLINE."""
+    if getattr(settings, 'PROPERTY_IMAGES_INLINE', False) and claim(PropertyImage.objects.filter(pk=image_id)):
+        generate_derivatives(image_id)
+
+
+def claim(queryset, limit=None):
+    """
+    Lease the images in `queryset` that no other worker holds, for CLAIM_LEASE.
+    Returns their ids; process them with generate_derivatives().
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        image_ids = list(
+            queryset.select_for_update(skip_locked=True)
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lte=now))
+            .order_by('pk').values_list('pk', flat=True)[:limit]
+        )
+        PropertyImage.objects.filter(pk__in=image_ids).update(claimed_until=now + CLAIM_LEASE)
+    return image_ids
+
+
+def pending_batch(limit):
+    """Claim up to `limit` PENDING images for the image worker."""
+    return claim(PropertyImage.objects.filter(processing_status='PENDING'), limit)
@@ -0,0 +1,140 @@
+"""
+Bulk listing import for sellers/brokers with large inventories (CSV or JSONL).
+
+Rows are parsed one at a time from the upload stream and validated by a
+single reused PropertySerializer subclass, so the rules are the same as for
+POST /api/listings/. Valid rows are written PROPERTY_IMPORT_BATCH_SIZE at a time with
+bulk_create. Invalid rows are reported by line number and skipped.
+
+bulk_create skips Property.save() and post_save, so this module does their
+work per batch: it sets geohash, queues embeddings, and adjusts the dashboard
+counters. The search_vector trigger still fires in the database.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from apps.admin_panel import counters
+from . import embedding_queue, geo
+from .models import Property
+from .serializers import PropertySerializer
+
+FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_ERRORS = 100
+
+
+class ListingImportError(Exception):
+    pass
+
+
+class PropertyImportSerializer(PropertySerializer):
+    class Meta(PropertySerializer.Meta):
+        fields = [
+            'title', 'description', 'price', 'property_type', 'listing_type',
+            'address_line', 'latitude', 'longitude',
+        ]
+
+
+def default_batch_size():
+    return getattr(settings, 'PROPERTY_IMPORT_BATCH_SIZE', 1000)
+
+
+def detect_format(filename, requested=None):
+    fmt = (requested or filename.rsplit('.', 1)[-1]).lower()
+    if fmt == 'json':
+        fmt = 'jsonl'
+    if fmt not in FORMATS:
+        raise ListingImportError(f"Unsupported format {fmt!r}; use one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def iter_rows(stream, fmt):
+    """Yield (line number, dict) from a binary stream without reading it all into memory."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        yield from _parse(text, fmt)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Unreadable from here on; rows before this point have already been handled
+        raise ListingImportError(f"Could not read the file: {exc}")
+
+
+def _parse(text, fmt):
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Empty cells mean "not given", so optional fields fall back to their defaults
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ('', None)}
+        return
+
+    for line_num, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_num, exc
+            continue
+        yield line_num, row if isinstance(row, dict) else ValueError("Each line must be a JSON object")
+
+
+def build_listing(owner, data):
+    listing = Property(owner=owner, verification_status='PENDING', **data)
+    if listing.latitude is not None and listing.longitude is not None:
+        listing.geohash = geo.encode(listing.latitude, listing.longitude)  # Property.save() would do this
+    return listing
+
+
+def write_batch(listings):
+    with transaction.atomic():
+        Property.objects.bulk_create(listings)
+        embedding_queue.enqueue([listing.pk for listing in listings])
+        counters.adjust({
+            'properties.total': len(listings),
+            counters.property_status_key('PENDING'): len(listings),
+        })
+
+
+def import_listings(owner, stream, fmt, max_rows=None, dry_run=False, batch_size=None):
+    """
+    Import listings owned by `owner` from `stream`. Returns a report:
+    {'rows': n, 'created': n, 'error_count': n, 'errors': [{'line': 7, 'errors': {...}}, ...], 'truncated': bool}
+    Reading stops after `max_rows` rows (truncated=True); rows before that are kept.
+    """
+    batch_size = batch_size or default_batch_size()
+    serializer = PropertyImportSerializer()
+    report = {'rows': 0, 'created': 0, 'error_count': 0, 'errors': [], 'truncated': False}
+    pending = []
+
+    def flush():
+        if pending and not dry_run:
+            write_batch(pending)
+        report['created'] += len(pending)
+        pending.clear()
+
+    def reject(line, errors):
+        report['error_count'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line, 'errors': errors})
+
+    for line, row in iter_rows(stream, fmt):
+        if max_rows is not None and report['rows'] >= max_rows:
+            report['truncated'] = True
+            break
+        report['rows'] += 1
+        if isinstance(row, Exception):
+            reject(line, {'non_field_errors': [str(row)]})
+            continue
+        try:
+            data = serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            reject(line, exc.detail)
+            continue
+        pending.append(build_listing(owner, data))
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+    return report
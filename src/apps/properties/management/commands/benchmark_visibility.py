@@ -0,0 +1,129 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.properties.models import Property
+from apps.properties.views import PropertyViewSet
+from apps.properties.visibility import legacy_visible_listings
+
+User = get_user_model()
+
+ORDERINGS = ('-created_at', 'price')
+
+
+class LegacyPropertyViewSet(PropertyViewSet):
+    """PropertyViewSet.get_queryset() with the old OR + DISTINCT predicate."""
+    def get_queryset(self):
+        queryset = legacy_visible_listings(self.listing_queryset(), self.request.user)
+        return self.with_is_saved(queryset).order_by('-created_at')
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the logged-in listing feed with the old OR + DISTINCT visibility query "
+        "against visibility.visible_listings(). Seeds synthetic listings inside a "
+        "transaction that is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000,
+                            help="Synthetic listings to add before measuring (0 = use existing data only).")
+        parser.add_argument('--runs', type=int, default=5,
+                            help="Timed runs per query; the median is reported.")
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--explain', action='store_true',
+                            help="Also print EXPLAIN ANALYZE for each query.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['rows']:
+                self.seed(options['rows'])
+            seller = self.seller_with_hidden_listings()
+            buyer = User.objects.create(email='benchmark-buyer@example.com', username='benchmark-buyer@example.com')
+
+            for label, user in (('seller with hidden listings', seller), ('buyer', buyer)):
+                if user is None:
+                    continue
+                for ordering in ORDERINGS:
+                    self.stdout.write(f"\n{label}, ORDER BY {ordering}:")
+                    for name, viewset in (('legacy', LegacyPropertyViewSet), ('visible_listings', PropertyViewSet)):
+                        self.measure(name, viewset, user, ordering, options)
+
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        self.stdout.write(f"Seeding {rows} listings...")
+        rng = random.Random(0)
+        owners = User.objects.bulk_create(
+            User(email=f'benchmark-owner{i}@example.com', username=f'benchmark-owner{i}@example.com')
+            for i in range(max(rows // 100, 1))
+        )
+        statuses = ['VERIFIED'] * 90 + ['PENDING'] * 2 + ['REJECTED'] * 8
+        property_types = [code for code, _ in Property.PROPERTY_TYPES]
+        listing_types = [code for code, _ in Property.LISTING_TYPES]
+        description = 'Spacious home close to schools and the market. ' * 20
+        Property.objects.bulk_create(
+            (
+                Property(
+                    owner=rng.choice(owners),
+                    title=f'Benchmark listing {i}',
+                    description=description,
+                    price=Decimal(rng.randrange(500_000, 50_000_000, 1000)),
+                    property_type=rng.choice(property_types),
+                    listing_type=rng.choice(listing_types),
+                    address_line=f'{i} Main Road, Pune',
+                    verification_status=rng.choice(statuses),
+                    embedding=[rng.random() for _ in range(8)] * 192,  # Wide rows, like production
+                )
+                for i in range(rows)
+            ),
+            batch_size=1000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE properties_property SET created_at = now() - random() * interval '365 days' "
+                "WHERE title LIKE %s",
+                ['Benchmark listing %'],
+            )
+            cursor.execute('ANALYZE properties_property')
+
+    def seller_with_hidden_listings(self):
+        owner_id = (
+            Property.objects.exclude(verification_status='VERIFIED')
+            .values_list('owner_id', flat=True).first()
+        )
+        return User.objects.filter(pk=owner_id).first() if owner_id else None
+
+    def measure(self, name, viewset, user, ordering, options):
+        def first_page():
+            # The list view's own queryset (deferred columns, is_saved, filters) and paginator
+            request = Request(APIRequestFactory().get('/api/listings/', {
+                'ordering': ordering, 'page_size': options['page_size'],
+            }))
+            request.user = user
+            view = viewset(request=request, format_kwarg=None, action='list', args=(), kwargs={})
+            queryset = view.filter_queryset(view.get_queryset())
+            return view.paginator.paginate_queryset(queryset, request, view=view)
+
+        timings = []
+        for _ in range(max(options['runs'], 1)):
+            start = time.perf_counter()
+            first_page()  # Includes visible_listings()'s hidden-listing lookup
+            timings.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(f"  {name:<17} median {statistics.median(timings):8.2f} ms   min {min(timings):8.2f} ms")
+
+        if options['explain']:
+            with CaptureQueriesContext(connection) as ctx:
+                first_page()
+            with connection.cursor() as cursor:
+                for query in ctx.captured_queries:
+                    cursor.execute(f"EXPLAIN ANALYZE {query['sql']}")
+                    self.stdout.write('\n'.join(row[0] for row in cursor.fetchall()))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.properties import embedding_queue
+
+
+class Command(BaseCommand):
+    help = "Compute listing embeddings from the embedding queue (or backfill the whole catalogue)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Listings per embedder call (default: PROPERTY_EMBEDDING_BATCH_SIZE).")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling the queue instead of exiting once it is empty.")
+        parser.add_argument('--sleep', type=float, default=5.0,
+                            help="Seconds to wait between polls when the queue is empty (with --loop).")
+        parser.add_argument('--backfill', action='store_true',
+                            help="Embed every existing listing instead of draining the queue.")
+        parser.add_argument('--missing-only', action='store_true',
+                            help="With --backfill, only listings that have no embedding yet.")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="With --backfill, number of batches embedded in parallel.")
+        parser.add_argument('--convert-storage', action='store_true',
+                            help="Move stored vectors to the column PROPERTY_EMBEDDING_COMPACT selects "
+                                 "(run after changing it).")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['convert_storage']:
+            moved = embedding_queue.convert_storage()
+            self.stdout.write(self.style.SUCCESS(f"Converted {moved} listings' embeddings."))
+            return
+
+        if options['backfill']:
+            updated = embedding_queue.backfill(
+                batch_size=batch_size,
+                workers=options['workers'],
+                missing_only=options['missing_only'],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Backfill done: {updated} listings embedded."))
+            return
+
+        while True:
+            try:
+                claimed, updated, failed = embedding_queue.process_queue_batch(batch_size)
+            except Exception as exc:
+                if not options['loop']:
+                    raise
+                # Every listing in the batch failed (and was scheduled for a retry); back off
+                self.stderr.write(f"Embedding batch failed: {exc}")
+                time.sleep(options['sleep'])
+                continue
+            if claimed:
+                self.stdout.write(
+                    f"Processed {claimed} queued listings "
+                    f"({updated} embedded, {failed} failed, {claimed - updated - failed} unchanged)."
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,49 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.properties import importer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Import PENDING listings for a seller or broker from a CSV or JSONL file "
+        "(same columns and validation as the /api/listings/import/ upload, without its row limit)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--owner', required=True, help="Email of the seller/broker who will own the listings.")
+        parser.add_argument('--format', choices=importer.FORMATS, default=None,
+                            help="File format (default: from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Rows per INSERT (default: PROPERTY_IMPORT_BATCH_SIZE).")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only; write nothing.")
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(email__iexact=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['owner']}")
+        if not (owner.is_active_seller or owner.is_active_broker):
+            raise CommandError(f"{owner.email} is not an active seller or broker")
+
+        try:
+            fmt = importer.detect_format(options['path'], options['format'])
+            with open(options['path'], 'rb') as stream:
+                report = importer.import_listings(
+                    owner, stream, fmt,
+                    dry_run=options['dry_run'], batch_size=options['batch_size'],
+                )
+        except (importer.ListingImportError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        for error in report['errors']:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(
+            f"{verb} {report['created']} of {report['rows']} rows ({report['error_count']} rejected)."
+        )
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.properties import images
+from apps.properties.models import PropertyImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate resized derivatives for listing photos (and strip the originals' metadata). "
+        "With --loop, keep processing new uploads as they arrive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Regenerate every image's derivatives, not only PENDING/FAILED ones "
+                                 "(originals already stripped are not re-encoded).")
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Images processed in parallel.")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling for PENDING images instead of exiting (the image worker).")
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help="PENDING images taken per poll (with --loop).")
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help="Seconds to wait between polls when nothing is pending (with --loop).")
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            if not options['loop']:
+                queryset = PropertyImage.objects.order_by('pk')
+                if not options['all']:
+                    queryset = queryset.exclude(processing_status='READY')
+                # Images another worker is processing right now are skipped
+                self.process(pool, images.claim(queryset))
+                return
+
+            # FAILED images are left alone here (a bad file would fail forever); rerun without --loop
+            while True:
+                image_ids = images.pending_batch(options['batch_size'])
+                if image_ids:
+                    self.process(pool, image_ids)
+                else:
+                    time.sleep(options['sleep'])
+
+    def process(self, pool, image_ids):
+        results = list(pool.map(images.process_in_worker, image_ids))
+        done = sum(1 for result in results if result is not None)
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} of {len(image_ids)} images."))
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.properties import uploads
+from apps.properties.models import DocumentUpload
+
+
+class Command(BaseCommand):
+    help = "Abort resumable document uploads that have not received a chunk recently and delete their temp files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48,
+                            help="Abort uploads idle for longer than this (default 48).")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = DocumentUpload.objects.filter(status='IN_PROGRESS', updated_at__lt=cutoff)
+        count = 0
+        for upload in stale.iterator():
+            uploads.abort_upload(upload)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Aborted {count} stale uploads."))
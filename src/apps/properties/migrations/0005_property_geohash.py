@@ -0,0 +1,41 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.properties import geo
+
+
+def backfill_geohash(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    located = Property.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude')
+    batch = []
+    for prop in located.iterator(chunk_size=2000):
+        prop.geohash = geo.encode(prop.latitude, prop.longitude)
+        batch.append(prop)
+        if len(batch) >= 2000:
+            Property.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Property.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_remove_property_status_property_doc_7_12_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['geohash'], name='property_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
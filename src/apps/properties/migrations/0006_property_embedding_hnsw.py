@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:04
+
+import pgvector.django
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0005_property_geohash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=pgvector.django.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='property_embedding_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+    ]
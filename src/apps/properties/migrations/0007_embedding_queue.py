@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_property_embedding_hnsw'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingQueue',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='embedding_job', serialize=False, to='properties.property')),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='embedding_text_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+    ]
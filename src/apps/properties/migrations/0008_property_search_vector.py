@@ -0,0 +1,55 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:08
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+# Keep in sync with apps.properties.filters.SEARCH_CONFIG
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('simple', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}address_line, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce({row}description, '')), 'C')
+"""
+
+CREATE_TRIGGER = f"""
+CREATE FUNCTION properties_property_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER properties_property_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, address_line, description, search_vector
+    ON properties_property
+    FOR EACH ROW EXECUTE FUNCTION properties_property_search_vector_update();
+
+UPDATE properties_property SET search_vector = {SEARCH_VECTOR_SQL.format(row='')};
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS properties_property_search_vector_trigger ON properties_property;
+DROP FUNCTION IF EXISTS properties_property_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0007_embedding_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='property_search_gin'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:11
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0009_propertyimage_derivatives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('doc_type', models.CharField(choices=[('doc_7_12', '7/12 Extract'), ('doc_mojani', 'Mojani'), ('doc_na_order', 'NA Order'), ('doc_layout_order', 'Layout Order'), ('doc_layout_copy', 'Layout Copy'), ('doc_building_perm', 'Building Permission'), ('doc_floor_plan', 'Floor Plan')], max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.BigIntegerField()),
+                ('received_bytes', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('IN_PROGRESS', 'In Progress'), ('COMPLETE', 'Complete'), ('ABORTED', 'Aborted')], default='IN_PROGRESS', max_length=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_uploads', to='properties.property')),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:12
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0010_documentupload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # update_or_create without a unique constraint could leave duplicates; keep the newest
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM properties_recentlyviewed a
+                USING properties_recentlyviewed b
+                WHERE a.user_id = b.user_id
+                  AND a.property_id = b.property_id
+                  AND (a.viewed_at, a.id) < (b.viewed_at, b.id);
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='recentlyviewed',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='recentlyviewed',
+            index=models.Index(fields=['user', '-viewed_at'], name='recentlyviewed_user_recent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recentlyviewed',
+            constraint=models.UniqueConstraint(fields=('user', 'property'), name='recentlyviewed_user_property_uniq'),
+        ),
+    ]
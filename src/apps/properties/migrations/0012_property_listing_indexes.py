@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0011_recentlyviewed_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('verification_status', 'VERIFIED')), fields=['-created_at', '-id'], name='property_verified_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('verification_status', 'VERIFIED')), fields=['price', 'id'], name='property_verified_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('verification_status', 'VERIFIED')), fields=['property_type', 'listing_type', '-created_at'], name='property_verified_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['verification_status', '-created_at'], name='property_status_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['owner', '-created_at'], name='property_owner_recent_idx'),
+        ),
+    ]
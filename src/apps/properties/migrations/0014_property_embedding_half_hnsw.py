@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:21
+
+import apps.properties.fields
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import pgvector.django
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0013_property_recent_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Build the half-precision index before dropping the full one (needs pgvector >= 0.7)
+        migrations.AddIndex(
+            model_name='property',
+            index=pgvector.django.HnswIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.comparison.Cast('embedding', apps.properties.fields.HalfVectorField(dimensions=1536)), name='halfvec_cosine_ops'), ef_construction=64, m=16, name='property_embedding_half_hnsw'),
+        ),
+        migrations.RemoveIndex(
+            model_name='property',
+            name='property_embedding_hnsw',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0014_property_embedding_half_hnsw'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=models.Index(condition=models.Q(('processing_status', 'PENDING')), fields=['id'], name='propertyimage_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:38
+
+import apps.properties.fields
+import pgvector.django
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0015_propertyimage_pending_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='embedding_half',
+            field=apps.properties.fields.HalfVectorField(blank=True, dimensions=1536, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=pgvector.django.HnswIndex(ef_construction=64, fields=['embedding_half'], m=16, name='property_compact_embedding_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+    ]
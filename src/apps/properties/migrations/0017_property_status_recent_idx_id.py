@@ -0,0 +1,27 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0016_property_embedding_half'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='property',
+            name='property_verified_recent_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='property',
+            name='property_status_recent_idx',
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['verification_status', '-created_at', '-id'], name='property_status_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0017_property_status_recent_idx_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='embeddingqueue',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
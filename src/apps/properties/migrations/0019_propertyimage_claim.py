@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0018_embeddingqueue_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='original_stripped',
+            field=models.BooleanField(default=False),
+        ),
+        # READY images were stripped when they were processed
+        migrations.RunSQL(
+            "UPDATE properties_propertyimage SET original_stripped = true WHERE processing_status = 'READY'",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
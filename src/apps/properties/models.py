@@ -1,7 +1,57 @@
 import uuid
 from django.db import models
-from pgvector.django import VectorField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Cast
+from pgvector.django import VectorField, HnswIndex
 from django.conf import settings
+from django.utils import timezone
+
+from . import geo
+from .embeddings import EMBEDDING_DIMENSIONS
+from .fields import HalfVectorField
+
+# Columns no serializer outputs; ~6 KB of TOAST per row for the embedding alone
+HEAVY_FIELDS = ('embedding', 'embedding_half', 'search_vector')
+
+
+def half_precision_embedding():
+    """embedding::halfvec(1536), the expression the default ANN index is built on."""
+    return Cast('embedding', HalfVectorField(dimensions=EMBEDDING_DIMENSIONS))
+
+
+def compact_embeddings():
+    """PROPERTY_EMBEDDING_COMPACT: store vectors in embedding_half (halfvec) instead of embedding."""
+    return getattr(settings, 'PROPERTY_EMBEDDING_COMPACT', False)
+
+class PropertyQuerySet(models.QuerySet):
+    def for_listing(self, columns=None, owner=True, images=True):
+        """
+        Everything PropertySerializer touches, loaded up front: the owner in the
+        same query and all images in one extra query. Any endpoint serializing
+        listings should start from this so a page costs 2 queries, not 2N+1.
+
+        Sparse fieldsets pass ``columns`` (for .only()) and switch off the
+        owner join / image prefetch when the response doesn't include them.
+        """
+        queryset = self
+        if owner:
+            queryset = queryset.select_related('owner')
+        if images:
+            queryset = queryset.prefetch_related('images')
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def with_heavy_fields(self):
+        """Load the embedding/search_vector columns the default manager defers."""
+        return self.defer(None)
+
+class PropertyManager(models.Manager.from_queryset(PropertyQuerySet)):
+    def get_queryset(self):
+        # Deferred fields load on first access, and save() on a deferred instance
+        # only writes the loaded columns, so e.g. moderation no longer rewrites the vector.
+        return super().get_queryset().defer(*HEAVY_FIELDS)
 
 class Property(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -32,6 +82,7 @@ class Property(models.Model):
     address_line = models.TextField()
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False) # Kept in sync by save()
     
     # --- Documents (PDFs) - Optional but builds trust ---
     # We use FileField. In production, these should go to S3/Cloudinary.
@@ -53,18 +104,131 @@ class Property(models.Model):
     rejection_reason = models.TextField(null=True, blank=True) # If admin rejects, say why
 
     # --- Search ---
-    embedding = VectorField(dimensions=1536, null=True, blank=True)
+    # Exactly one of these holds the listing's vector: embedding (4-byte floats) by default,
+    # embedding_half (2-byte floats, half the row size) with PROPERTY_EMBEDDING_COMPACT.
+    embedding = VectorField(dimensions=EMBEDDING_DIMENSIONS, null=True, blank=True)
+    embedding_half = HalfVectorField(dimensions=EMBEDDING_DIMENSIONS, null=True, blank=True, editable=False)
+    embedding_text_hash = models.CharField(max_length=64, null=True, blank=True, editable=False) # Hash of the text last embedded
+    # Weighted title (A) > address (B) > description (C). Maintained by a DB trigger (migration 0008).
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PropertyManager()
+
+    class Meta:
+        indexes = [
+            # varchar_pattern_ops lets "geohash LIKE 'tek1%'" use the index
+            models.Index(fields=['geohash'], name='property_geohash_idx', opclasses=['varchar_pattern_ops']),
+            # ANN index for semantic search, on half-precision copies of the vectors: half
+            # the memory of a vector_cosine_ops index. Results are re-ranked at full precision.
+            HnswIndex(
+                OpClass(half_precision_embedding(), name='halfvec_cosine_ops'),
+                name='property_embedding_half_hnsw', m=16, ef_construction=64,
+            ),
+            # The same for compact storage. HNSW skips NULLs, so whichever of the two
+            # indexes belongs to the unused column stays empty. Searched without a re-rank.
+            HnswIndex(
+                fields=['embedding_half'], opclasses=['halfvec_cosine_ops'],
+                name='property_compact_embedding_hnsw', m=16, ef_construction=64,
+            ),
+            GinIndex(fields=['search_vector'], name='property_search_gin'),
+
+            # --- Listing hot paths (see tests.py for the EXPLAIN checks) ---
+            # ?ordering=price and price__gte/lte ranges on the public catalogue
+            models.Index(
+                fields=['price', 'id'], name='property_verified_price_idx',
+                condition=models.Q(verification_status='VERIFIED'),
+            ),
+            # ?property_type=&listing_type= filters, newest first
+            models.Index(
+                fields=['property_type', 'listing_type', '-created_at'], name='property_verified_type_idx',
+                condition=models.Q(verification_status='VERIFIED'),
+            ),
+            # Public feed and its keyset pages (WHERE VERIFIED ORDER BY created_at DESC, id DESC)
+            # and the admin moderation queue (AdminPropertyList ?status=PENDING)
+            models.Index(fields=['verification_status', '-created_at', '-id'], name='property_status_recent_idx'),
+            # "My listings" branch of the logged-in visibility rule (visibility.py)
+            models.Index(fields=['owner', '-created_at'], name='property_owner_recent_idx'),
+            # Feed for users who also see their own hidden listings (VERIFIED OR pk IN ...)
+            models.Index(fields=['-created_at', '-id'], name='property_recent_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Keep the geohash in sync with the coordinates (skip if they weren't loaded)
+        if not {'latitude', 'longitude'} & self.get_deferred_fields():
+            if self.latitude is not None and self.longitude is not None:
+                self.geohash = geo.encode(self.latitude, self.longitude)
+            else:
+                self.geohash = None
+
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+                kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
+class EmbeddingQueue(models.Model):
+    """Listings whose embedding needs (re)computing. Drained by `manage.py embed_properties`."""
+    property = models.OneToOneField(Property, primary_key=True, related_name='embedding_job', on_delete=models.CASCADE)
+    enqueued_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Claiming leases the job until then; a failed job waits there for its retry
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
 class PropertyImage(models.Model):
     property = models.ForeignKey(Property, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='properties/')
     is_thumbnail = models.BooleanField(default=False)
 
+    # --- Resized copies (filled in the background by apps.properties.images) ---
+    PROCESSING_STATUS = [('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')]
+    processing_status = models.CharField(max_length=10, choices=PROCESSING_STATUS, default='PENDING')
+    width = models.PositiveIntegerField(null=True, blank=True) # Of the original, after EXIF rotation
+    height = models.PositiveIntegerField(null=True, blank=True)
+    # {"thumb": {"width": 200, "height": 150, "webp": "<path>", "jpeg": "<path>"}, "card": {...}, "full": {...}}
+    derivatives = models.JSONField(default=dict, blank=True)
+    original_stripped = models.BooleanField(default=False) # `image` has been rewritten without metadata
+    claimed_until = models.DateTimeField(null=True, blank=True) # Lease held by the worker processing it
+
+    class Meta:
+        indexes = [
+            # The image worker's poll (images.pending_batch)
+            models.Index(fields=['id'], name='propertyimage_pending_idx', condition=models.Q(processing_status='PENDING')),
+        ]
+
+class DocumentUpload(models.Model):
+    """
+    A chunked, resumable upload of one of the Property.doc_* files.
+    Chunks are appended to a temp file (see uploads.py); when the last byte
+    arrives the file is attached to the property and the temp file removed.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    property = models.ForeignKey(Property, related_name='document_uploads', on_delete=models.CASCADE)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+
+    DOC_TYPES = [
+        ('doc_7_12', '7/12 Extract'),
+        ('doc_mojani', 'Mojani'),
+        ('doc_na_order', 'NA Order'),
+        ('doc_layout_order', 'Layout Order'),
+        ('doc_layout_copy', 'Layout Copy'),
+        ('doc_building_perm', 'Building Permission'),
+        ('doc_floor_plan', 'Floor Plan'),
+    ]
+    doc_type = models.CharField(max_length=20, choices=DOC_TYPES)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+
+    STATUS_CHOICES = [('IN_PROGRESS', 'In Progress'), ('COMPLETE', 'Complete'), ('ABORTED', 'Aborted')]
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='IN_PROGRESS')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
 # --- NEW: User Interactions ---
 
 class SavedProperty(models.Model):
@@ -78,4 +242,13 @@ class SavedProperty(models.Model):
 class RecentlyViewed(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     property = models.ForeignKey(Property, on_delete=models.CASCADE)
-    viewed_at = models.DateTimeField(auto_now=True) # Updates time if viewed again
+    viewed_at = models.DateTimeField(default=timezone.now) # Set by the view buffer (recent_views.py) to the time of the view
+
+    class Meta:
+        constraints = [
+            # One row per (user, property); a repeat view just moves viewed_at
+            models.UniqueConstraint(fields=['user', 'property'], name='recentlyviewed_user_property_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-viewed_at'], name='recentlyviewed_user_recent_idx'),
+        ]
@@ -0,0 +1,154 @@
+import base64
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on (<ordering field>, id).
+
+    The page position is the last row's sort value and id, so every page is a
+    "WHERE (field, id) < (value, id) ORDER BY field, id LIMIT n" index range
+    scan. Page 500 costs the same as page 1, and rows inserted while a client
+    scrolls don't shift or duplicate results the way OFFSET does.
+
+    The ordering is taken from the queryset (i.e. after OrderingFilter ran);
+    only fields listed in ``cursor_fields`` can be paginated, anything else
+    falls back to ``default_ordering``.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    default_ordering = '-created_at'
+    tiebreaker = 'id'
+    tiebreaker_parser = uuid.UUID  # Every paginated model has a UUID primary key
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Ordering field -> parser turning the cursor's string value back into a DB value
+    cursor_fields = {
+        'created_at': parse_datetime,
+        'price': Decimal,
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor['reverse'])
+        if self.reverse:
+            descending = not descending
+
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}{self.tiebreaker}')
+
+        if cursor:
+            op = 'lt' if descending else 'gt'
+            value, pk = cursor['value'], cursor['id']
+            queryset = queryset.filter(
+                # The redundant lte/gte gives Postgres a plain range condition for the index
+                Q(**{f'{field}__{op}e': value}),
+                Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'{self.tiebreaker}__{op}': pk}),
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.has_next = bool(results) and (has_more if not self.reverse else True)
+        self.has_previous = bool(results) and ((cursor is not None) if not self.reverse else has_more)
+        self.first, self.last = (results[0], results[-1]) if results else (None, None)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        order_by = queryset.query.order_by
+        if order_by and isinstance(order_by[0], str) and order_by[0].lstrip('-') in self.cursor_fields:
+            return order_by[0]
+        return self.default_ordering
+
+    # --- Cursor encoding ---
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.build_link(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.build_link(self.first, reverse=True)
+
+    def build_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        value, pk = getattr(row, self.ordering.lstrip('-')), getattr(row, self.tiebreaker)
+        payload = json.dumps(
+            {'o': self.ordering, 'v': self.encode_value(value), 'id': str(pk), 'r': reverse},
+            separators=(',', ':'),
+        )
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def encode_value(value):
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, float):
+            return repr(value)  # Round-trips exactly
+        return str(value)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if payload['o'] != self.ordering:
+                raise ValueError('cursor belongs to a different ordering')
+            value = self.cursor_fields[self.ordering.lstrip('-')](payload['v'])
+            if value is None:
+                raise ValueError('unparsable cursor value')
+            return {
+                'value': value,
+                'id': self.tiebreaker_parser(payload['id']),
+                'reverse': bool(payload['r']),
+            }
+        except (TypeError, ValueError, KeyError, AttributeError, InvalidOperation, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class ListingPagination(KeysetPagination):
+    """Listings feed: newest first by default; price, distance and relevance orderings also paginate by keyset."""
+    page_size = 20
+    cursor_fields = {
+        **KeysetPagination.cursor_fields,
+        'distance_km': float,  # ?near= searches (GeoFilterBackend)
+        'search_rank': float,  # ?search= relevance (ListingSearchFilter)
+    }
@@ -0,0 +1,140 @@
+"""
+Write-behind buffer for "recently viewed" history.
+
+Opening a listing used to run an update_or_create on RecentlyViewed inside the
+request. Views are now collected in process memory, keyed by (user, property)
+so repeat opens collapse into one entry, and written in batches:
+
+  * one INSERT ... ON CONFLICT (user, property) DO UPDATE SET viewed_at per batch
+  * then each affected user's history is trimmed to RECENTLY_VIEWED_LIMIT rows
+
+A batch is written when RECENT_VIEWS_FLUSH_SIZE views are pending or
+RECENT_VIEWS_FLUSH_INTERVAL seconds have passed (by a background thread), at
+interpreter exit, and before my_recent reads the table.
+
+Views of listings (or by users) deleted since are dropped before the write,
+so one stale key can't fail the batch's FK check. If the database is
+unreachable the batch goes back into the buffer for the next flush. History
+is still best-effort: views that were never flushed are lost when a worker
+is killed without a clean exit.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, InterfaceError, OperationalError, connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import Property, RecentlyViewed
+
+logger = logging.getLogger(__name__)
+
+
+def history_limit():
+    return getattr(settings, 'RECENTLY_VIEWED_LIMIT', 50)
+
+
+def prune(user_ids, keep=None):
+    """Delete everything but each user's `keep` most recent views."""
+    keep = history_limit() if keep is None else keep
+    stale = list(
+        RecentlyViewed.objects.filter(user_id__in=user_ids)
+        .annotate(rank=Window(RowNumber(), partition_by=[F('user_id')], order_by=[F('viewed_at').desc(), F('id').desc()]))
+        .filter(rank__gt=keep)
+        .values_list('pk', flat=True)
+    )
+    if stale:
+        RecentlyViewed.objects.filter(pk__in=stale).delete()
+    return len(stale)
+
+
+def drop_deleted(views):
+    """The entries of `views` whose user and property still exist."""
+    property_ids = set(Property.objects.filter(pk__in={pid for _, pid in views}).values_list('pk', flat=True))
+    user_ids = set(get_user_model().objects.filter(pk__in={uid for uid, _ in views}).values_list('pk', flat=True))
+    return {
+        key: viewed_at for key, viewed_at in views.items()
+        if key[0] in user_ids and key[1] in property_ids
+    }
+
+
+def write_views(views):
+    """Upsert {(user_id, property_id): viewed_at} and trim the users' history."""
+    views = drop_deleted(views) if views else views
+    if not views:
+        return 0
+    with transaction.atomic():
+        RecentlyViewed.objects.bulk_create(
+            [
+                RecentlyViewed(user_id=user_id, property_id=property_id, viewed_at=viewed_at)
+                for (user_id, property_id), viewed_at in views.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'property'],
+            update_fields=['viewed_at'],
+        )
+        prune({user_id for user_id, _ in views})
+    return len(views)
+
+
+class RecentViewBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def record(self, user_id, property_id):
+        with self._lock:
+            self._pending[(user_id, property_id)] = timezone.now()
+            full = len(self._pending) >= getattr(settings, 'RECENT_VIEWS_FLUSH_SIZE', 100)
+            if not full and self._timer is None:
+                self._start_timer()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            return write_views(pending)
+        except (OperationalError, InterfaceError, IntegrityError):
+            # Database unavailable, or a listing deleted between drop_deleted() and the
+            # INSERT: keep the views for the next flush, which checks them again.
+            logger.warning("Could not write %d recently viewed entries; will retry", len(pending), exc_info=True)
+            self._requeue(pending)
+            return 0
+        except Exception:
+            logger.exception("Dropped %d recently viewed entries", len(pending))
+            return 0
+
+    def _requeue(self, views):
+        with self._lock:
+            for key, viewed_at in views.items():
+                # A view recorded since the failed flush is newer; keep it
+                self._pending.setdefault(key, viewed_at)
+            if self._timer is None:
+                self._start_timer()
+
+    def _start_timer(self):
+        interval = getattr(settings, 'RECENT_VIEWS_FLUSH_INTERVAL', 5)
+        self._timer = threading.Timer(interval, self._flush_in_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_in_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connection.close()  # The timer thread opened its own DB connection
+
+
+buffer = RecentViewBuffer()
+atexit.register(buffer.flush)
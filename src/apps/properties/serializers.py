@@ -1,16 +1,65 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import Property, PropertyImage, SavedProperty, RecentlyViewed
+from rest_framework.permissions import SAFE_METHODS
+from .models import Property, PropertyImage, SavedProperty, RecentlyViewed, DocumentUpload
+from .uploads import UploadError, check_document
 from apps.users.serializers import UserSerializer # Ensure you have a basic UserSerializer
 
+def _media_url(request, path):
+    url = default_storage.url(path)
+    return request.build_absolute_uri(url) if request else url
+
 class PropertyImageSerializer(serializers.ModelSerializer):
+    # The upload, once the image worker has rewritten it without EXIF/GPS; null before that
+    image = serializers.SerializerMethodField()
+    # {"thumb": {"width": 200, "height": 150, "webp": url, "jpeg": url}, "card": {...}, "full": {...}}
+    # Empty until the background resize has run.
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = PropertyImage
-        fields = ['id', 'image', 'is_thumbnail']
+        fields = ['id', 'image', 'is_thumbnail', 'width', 'height', 'srcset']
+
+    def get_image(self, obj):
+        if obj.processing_status != 'READY' or not obj.image:
+            return None
+        return _media_url(self.context.get('request'), obj.image.name)
+
+    def get_srcset(self, obj):
+        request = self.context.get('request')
+        return {
+            name: {
+                'width': entry['width'],
+                'height': entry['height'],
+                **{fmt: _media_url(request, entry[fmt]) for fmt in ('webp', 'jpeg') if entry.get(fmt)},
+            }
+            for name, entry in (obj.derivatives or {}).items()
+        }
+
+def get_requested_fields(request):
+    """
+    Sparse fieldsets for listing reads:
+      ?view=card         -> PropertySerializer.CARD_FIELDS (search results grid)
+      ?fields=id,title   -> just those fields (unknown names are ignored)
+    Returns None when the client wants the full representation.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    if request.query_params.get('view') == 'card':
+        return set(PropertySerializer.CARD_FIELDS)
+    fields = request.query_params.get('fields')
+    if fields:
+        return {name.strip() for name in fields.split(',') if name.strip()} | {'id'}
+    return None
 
 class PropertySerializer(serializers.ModelSerializer):
     owner_name = serializers.ReadOnlyField(source='owner.full_name')
-    owner_id = serializers.ReadOnlyField(source='owner.id')
+    owner_id = serializers.ReadOnlyField()
     images = PropertyImageSerializer(many=True, read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+    distance_km = serializers.FloatField(read_only=True) # Only present on ?near= searches
+    similarity = serializers.FloatField(read_only=True) # Only present on semantic search
+    is_saved = serializers.BooleanField(read_only=True) # Only present for logged-in users
     
     # We return Booleans for docs to Frontend to show "Tick Marks"
     has_7_12 = serializers.SerializerMethodField()
@@ -23,15 +72,71 @@ class PropertySerializer(serializers.ModelSerializer):
             'id', 'owner_name', 'owner_id', 'title', 'description', 'price', 
             'property_type', 'listing_type', 'address_line', 'latitude', 'longitude',
             'verification_status', 'rejection_reason',
-            'created_at', 'images', 
+            'created_at', 'images', 'thumbnail',
             # Documents (For owner/admin to see actual link)
             'doc_7_12', 'doc_mojani', 'doc_na_order', 
             'doc_layout_order', 'doc_layout_copy', 
             'doc_building_perm', 'doc_floor_plan',
             # Trust Indicators (For buyers)
-            'has_7_12', 'has_mojani'
+            'has_7_12', 'has_mojani',
+            'distance_km', 'similarity', 'is_saved',
         ]
         read_only_fields = ['verification_status', 'rejection_reason', 'created_at']
 
+    # ?view=card: only what a listing card renders
+    CARD_FIELDS = [
+        'id', 'title', 'price', 'property_type', 'listing_type',
+        'thumbnail', 'latitude', 'longitude', 'distance_km', 'similarity', 'is_saved',
+    ]
+
+    # Serializer fields that don't map 1:1 to a Property column -> columns they read
+    FIELD_COLUMNS = {
+        'owner_name': ['owner', 'owner__full_name'],
+        'owner_id': ['owner'],
+        'images': [],
+        'thumbnail': [],
+        'has_7_12': ['doc_7_12'],
+        'has_mojani': ['doc_mojani'],
+        'distance_km': [],
+        'similarity': [],
+        'is_saved': [],
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = get_requested_fields(self.context.get('request'))
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def columns_for(cls, fields):
+        """Property columns needed to render ``fields`` (for QuerySet.only())."""
+        columns = {'id'}
+        for name in fields & set(cls.Meta.fields):
+            columns.update(cls.FIELD_COLUMNS.get(name, [name]))
+        return columns
+
+    def get_thumbnail(self, obj):
+        # Uses the prefetched images; marked thumbnail first, else the first upload
+        images = sorted(obj.images.all(), key=lambda img: (not img.is_thumbnail, img.id))
+        if not images:
+            return None
+        thumb = (images[0].derivatives or {}).get('thumb', {})
+        if thumb.get('webp'):
+            return _media_url(self.context.get('request'), thumb['webp'])
+        return None # Not processed yet; the original may still carry GPS
+
+    def validate(self, attrs):
+        # Same per-document limits as the resumable upload API
+        for doc_type, _ in DocumentUpload.DOC_TYPES:
+            upload = attrs.get(doc_type)
+            if upload:
+                try:
+                    check_document(doc_type, upload.name, upload.size)
+                except UploadError as exc:
+                    raise serializers.ValidationError({doc_type: exc.message})
+        return attrs
+
     def get_has_7_12(self, obj): return bool(obj.doc_7_12)
     def get_has_mojani(self, obj): return bool(obj.doc_mojani)
\ No newline at end of file
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Property, PropertyImage
+from . import embedding_queue, images
+
+
+@receiver(post_save, sender=Property)
+def queue_embedding(sender, instance, update_fields=None, **kwargs):
+    """Queue the listing for (re)embedding when its searchable text changed."""
+    fields = set(embedding_queue.TEXT_FIELDS)
+    if update_fields is not None and not fields & set(update_fields):
+        return
+    if fields & instance.get_deferred_fields():
+        return
+
+    digest = embedding_queue.text_hash(embedding_queue.embedding_text(instance))
+    if digest != instance.embedding_text_hash:
+        transaction.on_commit(lambda: embedding_queue.enqueue([instance.pk]))
+
+
+@receiver(post_save, sender=PropertyImage)
+def queue_image_processing(sender, instance, created, update_fields=None, **kwargs):
+    """Resize new (or replaced) photos in the background once the upload is committed."""
+    if created or 'image' in (update_fields or ()):
+        image_id = instance.pk
+        if not created:  # A new file: its metadata hasn't been stripped
+            PropertyImage.objects.filter(pk=image_id).update(processing_status='PENDING', original_stripped=False)
+        transaction.on_commit(lambda: images.schedule(image_id))
+
+
+@receiver(post_delete, sender=PropertyImage)
+def remove_image_derivatives(sender, instance, **kwargs):
+    transaction.on_commit(lambda: images.delete_derivatives(instance))
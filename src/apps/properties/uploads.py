@@ -0,0 +1,198 @@
+"""
+Chunked, resumable uploads for property documents (the doc_* fields).
+
+Flow:
+  1. POST /api/listings/<id>/documents/        {doc_type, filename, size} -> upload id
+  2. PUT  /api/document-uploads/<upload id>/   raw bytes + "Content-Range: bytes 0-5242879/18874368"
+     ... repeat; after a dropped connection, GET the upload to learn
+     received_bytes and continue from there.
+  3. The request carrying the last byte attaches the file to the property.
+     If that fails (storage error, crash), the upload stays IN_PROGRESS with
+     every byte received; PUT again with an empty body and
+     "Content-Range: bytes */<total>" to retry attaching it.
+
+Each chunk is streamed to its own part file first, so no DB lock is held while
+a slow mobile client is still sending; the part is then appended under a short
+row lock that also checks the chunk starts exactly where the last one ended.
+"""
+import logging
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+
+from .models import DocumentUpload, Property
+
+MB = 1024 * 1024
+DEFAULT_MAX_SIZE = 25 * MB
+STREAM_BLOCK = 64 * 1024
+ALLOWED_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png'}
+
+_CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+_FINALIZE_RANGE_RE = re.compile(r'^bytes \*/(\d+)$')
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def max_size(doc_type):
+    return getattr(settings, 'DOCUMENT_UPLOAD_MAX_SIZES', {}).get(doc_type, DEFAULT_MAX_SIZE)
+
+
+def max_chunk_size():
+    return getattr(settings, 'DOCUMENT_UPLOAD_CHUNK_SIZE', 5 * MB)
+
+
+def temp_dir():
+    path = Path(getattr(settings, 'DOCUMENT_UPLOAD_TEMP_DIR', Path(settings.MEDIA_ROOT) / 'uploads_in_progress'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def temp_path(upload):
+    return temp_dir() / f'{upload.pk}.upload'
+
+
+def check_document(doc_type, filename, size):
+    """Validation shared by resumable uploads and the multipart listing form."""
+    if Path(filename or '').suffix.lower() not in ALLOWED_EXTENSIONS:
+        raise UploadError(f"{doc_type}: only {', '.join(sorted(ALLOWED_EXTENSIONS))} files are accepted")
+    limit = max_size(doc_type)
+    if size > limit:
+        raise UploadError(f"{doc_type}: file is larger than the {limit // MB} MB limit", status=413)
+
+
+def start_upload(property_obj, user, doc_type, filename, size):
+    if doc_type not in dict(DocumentUpload.DOC_TYPES):
+        raise UploadError("Invalid doc_type")
+    if size <= 0:
+        raise UploadError("size must be a positive number of bytes")
+    filename = os.path.basename(filename or '')
+    check_document(doc_type, filename, size)
+
+    upload = DocumentUpload.objects.create(
+        property=property_obj, owner=user, doc_type=doc_type,
+        filename=filename, total_size=size,
+    )
+    temp_path(upload).touch()
+    return upload
+
+
+def parse_content_range(header, total_size):
+    match = _CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise UploadError("Content-Range header must look like 'bytes <start>-<end>/<total>'")
+    start, end, total = (int(g) for g in match.groups())
+    if total != total_size or end < start or end >= total:
+        raise UploadError("Content-Range does not fit this upload", status=416)
+    return start, end - start + 1
+
+
+def receive_chunk(upload, stream, content_range, content_length):
+    """Append one chunk. Returns the refreshed upload (attached if it was the last chunk)."""
+    finalize = _FINALIZE_RANGE_RE.match(content_range or '')
+    if finalize:
+        if content_length or int(finalize.group(1)) != upload.total_size:
+            raise UploadError("Send 'Content-Range: bytes */<total>' with an empty body to finish the upload")
+        return attach(upload)
+
+    start, length = parse_content_range(content_range, upload.total_size)
+    if length > max_chunk_size():
+        raise UploadError(f"Chunks may be at most {max_chunk_size() // MB} MB", status=413)
+    if content_length != length:
+        raise UploadError("Content-Length does not match Content-Range")
+    if upload.status != 'IN_PROGRESS':
+        raise UploadError(f"Upload is {upload.status.lower()}", status=409)
+
+    # 1. Stream the body to a private part file (no locks held)
+    part_path = temp_dir() / f'{upload.pk}.{uuid.uuid4().hex}.part'
+    try:
+        written = 0
+        with open(part_path, 'wb') as part:
+            while written < length:
+                block = stream.read(min(STREAM_BLOCK, length - written))
+                if not block:
+                    break
+                part.write(block)
+                written += len(block)
+        if written != length:
+            raise UploadError("Chunk ended early; resend it")
+
+        # 2. Append it if it continues exactly where the upload left off
+        with transaction.atomic():
+            upload = DocumentUpload.objects.select_for_update().get(pk=upload.pk)
+            if upload.status != 'IN_PROGRESS':
+                raise UploadError(f"Upload is {upload.status.lower()}", status=409)
+            if start != upload.received_bytes:
+                raise UploadError(f"Expected a chunk starting at byte {upload.received_bytes}", status=409)
+            with open(temp_path(upload), 'r+b') as target, open(part_path, 'rb') as part:
+                target.seek(start)
+                shutil.copyfileobj(part, target, STREAM_BLOCK)
+                target.truncate()
+            upload.received_bytes = start + length
+            upload.save(update_fields=['received_bytes', 'updated_at'])
+    finally:
+        part_path.unlink(missing_ok=True)
+
+    if upload.received_bytes == upload.total_size:
+        return attach(upload)
+    return upload
+
+
+def attach(upload):
+    """complete_upload() for a request handler: a failure leaves the upload retryable."""
+    try:
+        return complete_upload(upload)
+    except UploadError:
+        raise
+    except Exception:
+        logger.exception("Could not attach document upload %s", upload.pk)
+        raise UploadError(
+            "All bytes were received but the file could not be attached; "
+            f"retry with an empty PUT and 'Content-Range: bytes */{upload.total_size}'",
+            status=503,
+        )
+
+
+def complete_upload(upload):
+    """
+    Move the assembled file into the property's doc_* field. Runs under the row
+    lock and only marks the upload COMPLETE once the file is attached, so it can
+    be retried after a failure and two retries can't both attach it.
+    """
+    path = temp_path(upload)
+    with transaction.atomic():
+        upload = DocumentUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status == 'COMPLETE':
+            return upload
+        if upload.status != 'IN_PROGRESS' or upload.received_bytes != upload.total_size:
+            raise UploadError(
+                f"Upload is {upload.status.lower()} with {upload.received_bytes} of {upload.total_size} bytes",
+                status=409,
+            )
+        property_obj = Property.objects.only('id').get(pk=upload.property_id)
+        with open(path, 'rb') as fh:
+            getattr(property_obj, upload.doc_type).save(upload.filename, File(fh), save=False)
+        property_obj.save(update_fields=[upload.doc_type, 'updated_at'])
+
+        upload.status = 'COMPLETE'
+        upload.save(update_fields=['status', 'updated_at'])
+    path.unlink(missing_ok=True)
+    return upload
+
+
+def abort_upload(upload):
+    upload.status = 'ABORTED'
+    upload.save(update_fields=['status', 'updated_at'])
+    temp_path(upload).unlink(missing_ok=True)
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PropertyViewSet
+from .views import PropertyViewSet, DocumentUploadView
 
 router = DefaultRouter()
 router.register(r'listings', PropertyViewSet, basename='property')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('document-uploads/<uuid:pk>/', DocumentUploadView.as_view(), name='document-upload'),
 ]
\ No newline at end of file
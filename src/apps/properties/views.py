@@ -1,13 +1,34 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q  # <--- CRITICAL: Needed for the OR logic
+from django.db import connection, transaction
+from django.conf import settings
+from django.urls import reverse
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from django.db.models import Exists, OuterRef
+from pgvector.django import CosineDistance
 
-from .models import Property, PropertyImage, SavedProperty, RecentlyViewed
-from .serializers import PropertySerializer, PropertyImageSerializer
+from .models import (
+    Property, PropertyImage, SavedProperty, DocumentUpload, compact_embeddings, half_precision_embedding,
+)
+from .serializers import PropertySerializer, PropertyImageSerializer, get_requested_fields
 from .permissions import IsOwnerOrReadOnly
+from .filters import GeoFilterBackend, ListingSearchFilter
+from .visibility import cache_scope, visibility_q, visible_listings
+from .embeddings import get_embedder
+from .pagination import ListingPagination
+from . import cache as listing_cache
+from . import uploads
+from . import facets
+from . import importer
+from . import recent_views
+
+MAX_EF_SEARCH = 1000 # pgvector's upper bound for hnsw.ef_search
 
 class PropertyViewSet(viewsets.ModelViewSet):
     serializer_class = PropertySerializer
@@ -18,67 +39,251 @@ class PropertyViewSet(viewsets.ModelViewSet):
     parser_classes = [MultiPartParser, FormParser] # Allows file uploads
     
     # Filter Configuration
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, GeoFilterBackend, ListingSearchFilter, filters.OrderingFilter]
     filterset_fields = {
         'price': ['gte', 'lte'],  # price__gte=1000, price__lte=5000
         'property_type': ['exact'],
         'listing_type': ['exact'],
     }
+    # ?search= is full-text over title > address_line > description (see ListingSearchFilter)
     search_fields = ['title', 'address_line', 'description']
+    # Map search: ?near=lat,lng&radius_km=5 or ?bbox=min_lat,min_lng,max_lat,max_lng (see GeoFilterBackend)
     ordering_fields = ['price', 'created_at']
+    pagination_class = ListingPagination # Keyset cursors on (created_at, id) / (price, id)
 
     def get_queryset(self):
         """
-        Logic for Visibility:
+        Logic for Visibility (see visibility.py):
         1. Admin: Sees EVERYTHING.
         2. Seller/Broker (Owner): Sees Public VERIFIED items + Their OWN items (Pending/Rejected).
         3. Public (Guest/Buyer): Sees only VERIFIED items.
         """
-        
-        # 1. Admin Logic
-        if self.request.user.is_staff:
-            return Property.objects.all().order_by('-created_at')
-        
-        # 2. Logged In User Logic (Seller, Broker, or Buyer)
+        queryset = visible_listings(self.listing_queryset(), self.request.user)
         if self.request.user.is_authenticated:
-            return Property.objects.filter(
-                # Logic: Show if it is VERIFIED ... OR ... if I am the OWNER
-                Q(verification_status='VERIFIED') | Q(owner=self.request.user)
-            ).distinct().order_by('-created_at')
-            
-        # 3. Guest Logic
-        return Property.objects.filter(verification_status='VERIFIED').order_by('-created_at')
+            queryset = self.with_is_saved(queryset)
+        return queryset.order_by('-created_at')
 
-    def perform_create(self, serializer):
-        user = self.request.user
-        
+    def list(self, request, *args, **kwargs):
+        # Guests all see the same VERIFIED catalogue, so their pages can be shared
+        if request.user.is_authenticated or not listing_cache.enabled():
+            return super().list(request, *args, **kwargs)
+
+        key = listing_cache.make_key('list', request)
+        data = listing_cache.lookup(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            listing_cache.store(key, response.data)
+        return response
+
+    def listing_queryset(self):
+        """Property.objects.for_listing(), trimmed to the columns a ?fields= / ?view=card response needs."""
+        fields = get_requested_fields(self.request)
+        if fields is None:
+            return Property.objects.for_listing()
+
+        columns = PropertySerializer.columns_for(fields)
+        columns.update({'created_at', 'price'}) # Keyset pagination reads the sort keys off each row
+        return Property.objects.for_listing(
+            columns=columns,
+            owner='owner_name' in fields,
+            images=bool({'images', 'thumbnail'} & fields),
+        )
+
+    def with_is_saved(self, queryset):
+        """Heart icon state for the current user: one EXISTS subquery instead of a lookup per card."""
+        fields = get_requested_fields(self.request)
+        if fields is not None and 'is_saved' not in fields:
+            return queryset
+        return queryset.annotate(is_saved=Exists(
+            SavedProperty.objects.filter(user=self.request.user, property=OuterRef('pk'))
+        ))
+
+    def check_can_list(self, user):
         # CHECK: To upload, you MUST be an Active Seller OR Active Broker
         if not (user.is_active_seller or user.is_active_broker):
-            raise permissions.PermissionDenied(
+            raise PermissionDenied(
                 "Restricted: You must complete KYC and become a Seller or Broker to post listings."
             )
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        self.check_can_list(user)
         
         # If valid, save it with 'PENDING' status
         serializer.save(owner=user, verification_status='PENDING')
 
+    def perform_update(self, serializer):
+        was_public = serializer.instance.verification_status == 'VERIFIED'
+        serializer.save()
+        if was_public:
+            listing_cache.bump_catalogue_version()
+
+    def perform_destroy(self, instance):
+        was_public = instance.verification_status == 'VERIFIED'
+        instance.delete()
+        if was_public:
+            listing_cache.bump_catalogue_version()
+
     # --- Custom Actions (Save, Recent, etc.) ---
 
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post', 'delete'], permission_classes=[permissions.IsAuthenticated])
     def save_property(self, request, pk=None):
-        """Toggle Save/Unsave"""
+        """POST saves, DELETE unsaves. Both are idempotent, so a retried tap can't flip the state back."""
+        if request.method == 'DELETE':
+            try:
+                SavedProperty.objects.filter(user=request.user, property_id=pk).delete()
+            except DjangoValidationError: # Not a UUID
+                raise Http404
+            return Response({'message': 'Property removed from saved', 'is_saved': False}, status=200)
+
         property_obj = self.get_object()
-        saved_item, created = SavedProperty.objects.get_or_create(user=request.user, property=property_obj)
-        if not created:
-            saved_item.delete()
-            return Response({'message': 'Property removed from saved'}, status=200)
-        return Response({'message': 'Property saved'}, status=201)
+        SavedProperty.objects.bulk_create(
+            [SavedProperty(user=request.user, property=property_obj)],
+            ignore_conflicts=True, # ON CONFLICT (user, property) DO NOTHING
+        )
+        return Response({'message': 'Property saved', 'is_saved': True}, status=200)
+
+    @action(detail=True, methods=['post'], parser_classes=[JSONParser, FormParser])
+    def documents(self, request, pk=None):
+        """
+        Start a resumable document upload (owner only).
+        Body: {"doc_type": "doc_7_12", "filename": "7-12.pdf", "size": 18874368}
+        Then PUT the bytes in chunks to the returned upload_url (see DocumentUploadView).
+        """
+        property_obj = self.get_object()
+        try:
+            size = int(request.data.get('size', 0))
+        except (TypeError, ValueError):
+            return Response({'error': 'size must be a number of bytes'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            upload = uploads.start_upload(
+                property_obj, request.user,
+                request.data.get('doc_type'), request.data.get('filename'), size,
+            )
+        except uploads.UploadError as exc:
+            return Response({'error': exc.message}, status=exc.status)
+
+        data = upload_status(upload)
+        data['upload_url'] = request.build_absolute_uri(reverse('document-upload', args=[upload.pk]))
+        data['max_chunk_size'] = uploads.max_chunk_size()
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser],
+            permission_classes=[permissions.IsAuthenticated])
+    def import_listings(self, request):
+        """
+        Bulk create PENDING listings from a CSV or JSONL upload (multipart field "file").
+        Columns/keys: title, description, price, property_type, listing_type, address_line,
+        latitude, longitude. Optional form field "format" = csv|jsonl (default: from the file
+        name; not ?format=, which DRF reserves for picking the renderer).
+        ?dry_run=1 only validates. Invalid rows are reported by line and skipped.
+        """
+        self.check_can_list(request.user)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload the listings as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        try:
+            fmt = importer.detect_format(upload.name, request.data.get('format'))
+            report = importer.import_listings(
+                request.user, upload.file, fmt,
+                max_rows=getattr(settings, 'PROPERTY_IMPORT_MAX_ROWS', 10000),
+                dry_run=dry_run,
+            )
+        except importer.ListingImportError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        created = report['created'] and not dry_run
+        return Response(report, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Filter sidebar counts: /api/listings/facets/?listing_type=SELL&search=baner
+        Same filters and visibility as the list; see facets.py for the response shape.
+        """
+        predicate = visibility_q(request.user)
+        key = None
+        if listing_cache.enabled():
+            key = listing_cache.make_key(
+                'facets', request, scope=cache_scope(request.user, predicate), params=facets.FACET_PARAMS,
+            )
+            data = listing_cache.lookup(key)
+            if data is not None:
+                return Response(data)
+
+        queryset = Property.objects.all() if predicate is None else Property.objects.filter(predicate)
+        # property_type/listing_type/price are applied per facet inside facets.compute()
+        for backend in (GeoFilterBackend, ListingSearchFilter):
+            queryset = backend().filter_queryset(request, queryset, self)
+        data = facets.compute(queryset, request.query_params)
+        if key is not None:
+            listing_cache.store(key, data, getattr(settings, 'LISTINGS_FACETS_CACHE_TTL', 60))
+        return Response(data)
+
+    @action(detail=False, methods=['get'], url_path='semantic-search')
+    def semantic_search(self, request):
+        """
+        Natural language search: /api/listings/semantic-search/?q=3bhk near metro with parking
+        Combines with the normal filters (price__gte, property_type, near, ...).
+        Returns the top ?limit= matches (default 20, max 100) ranked by similarity.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Query parameter q is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        vector = get_embedder().embed_one(query)
+        if compact_embeddings():
+            # Only halfvecs are stored, so property_compact_embedding_hnsw's order is already
+            # the most exact one available: one index scan, no candidate re-rank.
+            queryset = self.filter_queryset(self.get_queryset()).filter(embedding_half__isnull=False)
+            ef_search = min(max(40, limit * 2), MAX_EF_SEARCH)
+            distance = CosineDistance('embedding_half', vector)
+        else:
+            queryset = self.filter_queryset(self.get_queryset()).filter(embedding__isnull=False)
+            # 1. Candidates from property_embedding_half_hnsw. The scan returns at most
+            #    ef_search rows, so asking for more would silently shorten the result.
+            rerank = max(getattr(settings, 'PROPERTY_SEARCH_RERANK_FACTOR', 4), 1)
+            candidate_count = min(limit * rerank, MAX_EF_SEARCH)
+            ef_search = min(max(40, candidate_count * 2), MAX_EF_SEARCH)
+            candidates = (
+                queryset
+                .annotate(ann_distance=CosineDistance(half_precision_embedding(), vector))
+                .order_by('ann_distance')
+                .values('pk')[:candidate_count]
+            )
+            # 2. Re-rank them by exact distance on the full-precision vectors
+            queryset = queryset.filter(pk__in=candidates)
+            distance = CosineDistance('embedding', vector)
+        queryset = (
+            queryset
+            .annotate(search_distance=distance, similarity=1.0 - distance)
+            .order_by('search_distance')[:limit]
+        )
+
+        with transaction.atomic():
+            # HNSW drops rows that fail the WHERE clause *after* the index scan,
+            # so widen the candidate list when filters are combined with it.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL hnsw.ef_search = %s', [ef_search])
+            results = list(queryset)
+
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
 
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def record_view(self, request, pk=None):
         """Frontend calls this when user opens details page"""
         property_obj = self.get_object()
-        RecentlyViewed.objects.update_or_create(user=request.user, property=property_obj)
-        
+        recent_views.buffer.record(request.user.pk, property_obj.pk)  # Written in batches, not in this request
+
         # Return details normally
         serializer = self.get_serializer(property_obj)
         return Response(serializer.data)
@@ -86,15 +291,79 @@ class PropertyViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_saved(self, request):
         """Get list of properties saved by current user"""
-        saved = SavedProperty.objects.filter(user=request.user).select_related('property')
-        props = [s.property for s in saved]
+        props = (
+            self.with_is_saved(self.listing_queryset())
+            .filter(savedproperty__user=request.user)
+            .order_by('-savedproperty__saved_at')
+        )
         serializer = self.get_serializer(props, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_recent(self, request):
         """Get list of last 10 properties viewed by current user"""
-        recent = RecentlyViewed.objects.filter(user=request.user).order_by('-viewed_at')[:10]
-        props = [r.property for r in recent]
+        recent_views.buffer.flush()  # Include views still waiting in this process's buffer
+        props = (
+            self.with_is_saved(self.listing_queryset())
+            .filter(recentlyviewed__user=request.user)
+            .order_by('-recentlyviewed__viewed_at')[:10]
+        )
         serializer = self.get_serializer(props, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+def upload_status(upload):
+    return {
+        'id': upload.pk,
+        'doc_type': upload.doc_type,
+        'filename': upload.filename,
+        'total_size': upload.total_size,
+        'received_bytes': upload.received_bytes,
+        'status': upload.status,
+    }
+
+class DocumentUploadView(APIView):
+    """
+    One resumable document upload.
+    GET    -> progress (resume from received_bytes after a dropped connection)
+    PUT    -> next chunk: raw body + "Content-Range: bytes <start>-<end>/<total>";
+              empty body + "Content-Range: bytes */<total>" retries attaching a fully received upload
+    DELETE -> abort
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [] # The body is read as a stream, never parsed into memory
+
+    def get_upload(self, request, pk):
+        try:
+            return DocumentUpload.objects.get(pk=pk, owner=request.user)
+        except DocumentUpload.DoesNotExist:
+            return None
+
+    def get(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(upload_status(upload))
+
+    def put(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+            upload = uploads.receive_chunk(upload, request.stream, request.META.get('HTTP_CONTENT_RANGE'), content_length)
+        except uploads.UploadError as exc:
+            return Response({'error': exc.message}, status=exc.status)
+
+        if upload.status == 'COMPLETE':
+            # Public listings show document tick marks
+            if Property.objects.filter(pk=upload.property_id, verification_status='VERIFIED').exists():
+                listing_cache.bump_catalogue_version()
+        return Response(upload_status(upload))
+
+    def delete(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        if upload.status == 'IN_PROGRESS':
+            uploads.abort_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
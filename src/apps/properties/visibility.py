@@ -0,0 +1,77 @@
+"""
+Which listings a user may see.
+
+  * staff: everything
+  * guests: VERIFIED
+  * logged-in users: VERIFIED plus their own PENDING/REJECTED listings
+
+The logged-in rule used to be ``filter(Q(VERIFIED) | Q(owner=user)).distinct()``.
+The filter never joins, so the DISTINCT removed nothing; it only made
+Postgres sort or hash every matching row, embedding and description
+included. The OR also kept the partial VERIFIED indexes out of play.
+
+visible_listings() looks up the user's hidden listings first. That is a few
+rows from an owner index, and most users have none. Then:
+
+  * no hidden listings: exactly the guest predicate, so the guest indexes
+    (feed, price, type) serve the query as they do for guests
+  * a few hidden listings: ``VERIFIED OR pk IN (...)``, with no DISTINCT;
+    ordered by recency this is a scan of property_recent_idx that stops
+    after one page
+  * more than MAX_INLINE_HIDDEN: ``VERIFIED OR owner = user``, same plan
+
+The lookup is one extra indexed query on every authenticated listing
+request, facet cache hits included: the cache scope depends on its result.
+Sub-millisecond, and cheaper than the DISTINCT it replaces.
+
+`manage.py benchmark_visibility` compares this with the old query.
+"""
+from django.db.models import Q
+
+from .models import Property
+
+PUBLIC = Q(verification_status='VERIFIED')
+MAX_INLINE_HIDDEN = 100
+
+
+def hidden_listing_ids(user, limit=MAX_INLINE_HIDDEN + 1):
+    """The user's own listings that the public can't see (not VERIFIED)."""
+    return list(
+        Property.objects.filter(owner=user)
+        .exclude(verification_status='VERIFIED')
+        .values_list('pk', flat=True)[:limit]
+    )
+
+
+def visibility_q(user):
+    """Predicate for the listings `user` may see, or None for no restriction."""
+    if user.is_staff:
+        return None
+    if not user.is_authenticated:
+        return PUBLIC
+
+    hidden = hidden_listing_ids(user)
+    if not hidden:
+        return PUBLIC
+    if len(hidden) > MAX_INLINE_HIDDEN:
+        return PUBLIC | Q(owner=user)
+    return PUBLIC | Q(pk__in=hidden)
+
+
+def visible_listings(queryset, user):
+    predicate = visibility_q(user)
+    return queryset if predicate is None else queryset.filter(predicate)
+
+
+def legacy_visible_listings(queryset, user):
+    """The pre-visibility.py query, kept for `manage.py benchmark_visibility`."""
+    return queryset.filter(PUBLIC | Q(owner=user)).distinct()
+
+
+def cache_scope(user, predicate):
+    """Who can share a cached response computed under `predicate` (from visibility_q)."""
+    if predicate is None:
+        return 'staff'
+    if predicate is PUBLIC:
+        return 'public'  # Guests and every user without hidden listings
+    return f'user:{user.pk}'
@@ -0,0 +1,88 @@
+"""
+JWT authentication that doesn't look the user up on every request.
+
+simplejwt's JWTAuthentication SELECTs the whole users_user row per request.
+CachedJWTAuthentication keeps the handful of columns requests actually use
+(SNAPSHOT_FIELDS) in the cache for AUTH_USER_CACHE_TTL seconds and rebuilds
+request.user from them with every other column deferred. Reading a deferred
+column still works; it just costs the query we skipped. save() on such an
+instance only writes the loaded columns.
+
+Entries are dropped whenever a User is saved or deleted (signals.py), so
+blocking a user, upgrading a role or editing the profile take effect on the
+next request. QuerySet.update() on users bypasses that; call invalidate().
+
+Invalidation only works if every worker reads the same cache, so snapshots are
+only used with a shared, non-database backend (Redis via REDIS_URL, as
+docker-compose runs it, or memcached). With a
+per-process LocMemCache a blocked user would stay logged in on the other
+workers for up to the TTL, and with the database cache a hit costs the query
+it saves; either way the user is loaded from the database as simplejwt does.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+SNAPSHOT_FIELDS = (
+    'id', 'email', 'username', 'full_name', 'phone_number',
+    'is_staff', 'is_superuser', 'is_active',
+    'is_active_seller', 'is_active_broker',
+)
+
+
+def get_cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def snapshots_enabled():
+    return not isinstance(get_cache(), (LocMemCache, DatabaseCache))
+
+
+def cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate(user_id):
+    get_cache().delete(cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN or not snapshots_enabled():
+            return super().get_user(validated_token)  # Needs the password hash / no shared cache
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        cache = get_cache()
+        key = cache_key(user_id)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = (
+                self.user_model.objects
+                .filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values(*SNAPSHOT_FIELDS)
+                .first()
+            )
+            if snapshot is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, snapshot, getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+
+        user = self.user_from_snapshot(snapshot)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    def user_from_snapshot(self, snapshot):
+        # from_db() wants the loaded columns in model order; the rest become deferred
+        field_names = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in snapshot]
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, field_names, [snapshot[name] for name in field_names])
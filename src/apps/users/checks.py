@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def check_otp_cache(app_configs, **kwargs):
+    """An OTP issued by one worker must be verifiable (and rate limited) by every other."""
+    alias = getattr(settings, 'OTP_CACHE_ALIAS', 'default')
+    if settings.DEBUG or not isinstance(caches[alias], LocMemCache):
+        return []
+    return [Error(
+        f"OTP_CACHE_ALIAS {alias!r} is a per-process LocMemCache.",
+        hint="Logins would fail when send-otp and verify-otp reach different workers, and the "
+             "attempt limit would be per worker; use a shared cache backend (database or Redis).",
+        id='users.E001',
+    )]
@@ -1,6 +1,8 @@
 import uuid
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 class User(AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -13,9 +15,7 @@ class User(AbstractUser):
     is_active_seller = models.BooleanField(default=False)
     is_active_broker = models.BooleanField(default=False)
     
-    # OTP Fields
-    otp = models.CharField(max_length=6, blank=True, null=True)
-    otp_created_at = models.DateTimeField(blank=True, null=True)
+    # Login OTPs live in the cache, not on this row (see apps/users/otp.py)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username'] # 'full_name' is not required for admin creation, but required for app usage
@@ -23,6 +23,16 @@ class User(AbstractUser):
     groups = models.ManyToManyField('auth.Group', related_name='custom_user_set', blank=True)
     user_permissions = models.ManyToManyField('auth.Permission', related_name='custom_user_set', blank=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Profile search (SearchProfileView). Trigram GIN indexes serve substring matches:
+            # UPPER(col) for Django's icontains (UPPER(col) LIKE UPPER('%q%')), the plain
+            # column for the typo-tolerant word-similarity operator.
+            GinIndex(OpClass(Upper('full_name'), name='gin_trgm_ops'), name='user_full_name_upper_trgm'),
+            GinIndex(fields=['full_name'], opclasses=['gin_trgm_ops'], name='user_full_name_trgm'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='user_email_upper_trgm'), # Admins only
+        ]
+
 class KycVerification(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     aadhaar_number = models.CharField(max_length=20, blank=True)
@@ -0,0 +1,82 @@
+"""
+Login OTPs, kept in the cache instead of on the User row.
+
+A pending login is one cache key that expires by itself after OTP_TTL_SECONDS,
+holding an HMAC of the code (the code itself is never stored) and a random
+token for this issue of the code. Each verification first claims an attempt
+slot with cache.add() on "<token>:1", "<token>:2", ... up to OTP_MAX_ATTEMPTS.
+add() is atomic on every backend, including the database cache, where incr()
+is a read followed by a write and parallel guesses could share one count.
+Digests are compared in constant time and the key is deleted on success, so a
+code works once.
+
+The cache must be shared by all web processes (the default database cache or
+Redis); users.E001 rejects a per-process LocMemCache when DEBUG is off.
+"""
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class OtpError(Exception):
+    pass
+
+
+def get_cache():
+    return caches[getattr(settings, 'OTP_CACHE_ALIAS', 'default')]
+
+
+def ttl():
+    return getattr(settings, 'OTP_TTL_SECONDS', 300)
+
+
+def max_attempts():
+    return getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+
+
+def _key(email):
+    ident = hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()
+    return f'otp:{ident}'
+
+
+def _digest(email, code):
+    message = f'{email.strip().lower()}:{code}'.encode('utf-8')
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def issue(email):
+    """Create a fresh 6-digit code for `email`, replacing any pending one."""
+    code = str(100000 + secrets.randbelow(900000))
+    # A new token also gives the new code a fresh set of attempt slots
+    get_cache().set(_key(email), (secrets.token_hex(8), _digest(email, code)), ttl())
+    return code
+
+
+def _claim_attempt(cache, key, token):
+    for attempt in range(1, max_attempts() + 1):
+        if cache.add(f'{key}:{token}:{attempt}', 1, ttl()):
+            return True
+    return False
+
+
+def verify(email, code):
+    """Consume the pending code for `email`; raises OtpError if it can't be used."""
+    cache = get_cache()
+    key = _key(email)
+
+    pending = cache.get(key)
+    if pending is None: # Never issued, or expired
+        raise OtpError('OTP Expired')
+    token, expected = pending
+    if not _claim_attempt(cache, key, token):
+        cache.delete(key)
+        raise OtpError('Too many attempts, request a new OTP')
+    if not hmac.compare_digest(expected, _digest(email, str(code or ''))):
+        raise OtpError('Invalid OTP')
+
+    # Only one of two concurrent correct submissions gets to delete the key
+    if not cache.delete(key):
+        raise OtpError('OTP Expired')
@@ -0,0 +1,17 @@
+"""Drop cached auth snapshots (authentication.py) when a user changes."""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_snapshot(sender, instance, **kwargs):
+    # Now, and again after commit so a request racing the transaction can't re-cache the old row
+    invalidate(instance.pk)
+    transaction.on_commit(lambda: invalidate(instance.pk))
@@ -1,3 +1,164 @@
-from django.test import TestCase
+import os
+import tempfile
+import unittest
+import uuid
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import otp
+from .authentication import CachedJWTAuthentication, cache_key
+
+User = get_user_model()
+
+
+@override_settings(OTP_MAX_ATTEMPTS=3)
+class OtpTests(TestCase):
+    """Runs against the configured (database) cache, where incr() isn't atomic."""
+    EMAIL = 'Buyer@Example.com'
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def wrong_code(self, code):
+        return '000000' if code != '000000' else '111111'
+
+    def test_code_works_once(self):
+        code = otp.issue(self.EMAIL)
+        otp.verify(self.EMAIL.lower(), code)
+        with self.assertRaisesMessage(otp.OtpError, 'OTP Expired'):
+            otp.verify(self.EMAIL, code)
+
+    def test_attempts_are_limited(self):
+        code = otp.issue(self.EMAIL)
+        for _ in range(3):
+            with self.assertRaisesMessage(otp.OtpError, 'Invalid OTP'):
+                otp.verify(self.EMAIL, self.wrong_code(code))
+        with self.assertRaisesMessage(otp.OtpError, 'Too many attempts'):
+            otp.verify(self.EMAIL, code)
+        with self.assertRaisesMessage(otp.OtpError, 'OTP Expired'):
+            otp.verify(self.EMAIL, code)
+
+    def test_new_code_gets_fresh_attempts(self):
+        code = otp.issue(self.EMAIL)
+        for _ in range(3):
+            with self.assertRaises(otp.OtpError):
+                otp.verify(self.EMAIL, self.wrong_code(code))
+        otp.verify(self.EMAIL, otp.issue(self.EMAIL))
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create(email='seller@example.com', username='seller@example.com')
+        self.token = AccessToken.for_user(self.user)
+
+    def authenticate(self):
+        return CachedJWTAuthentication().get_user(self.token)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_reads_the_database(self):
+        self.authenticate()
+        # update() skips the invalidation signal; another worker's save would too
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_database_cache_reads_the_database(self):
+        self.authenticate()
+        with self.assertNumQueries(1): # The default backend: no snapshot, simplejwt's SELECT
+            self.authenticate()
+
+    def assertSnapshotsServed(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().pk, self.user.pk)
+        self.user.save() # post_save drops the snapshot
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    def test_shared_file_cache_serves_snapshots(self):
+        # Shared by every process on the host, unlike LocMemCache
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}):
+            self.assertSnapshotsServed()
+
+    @unittest.skipUnless(os.environ.get('REDIS_URL'), "Needs a Redis server (REDIS_URL)")
+    def test_redis_serves_snapshots(self):
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': os.environ['REDIS_URL'],
+        }}):
+            caches['default'].delete(cache_key(self.user.pk))
+            self.assertSnapshotsServed()
+
+
+class ProfileSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def broker(name, **fields):
+            email = name.lower().replace(' ', '.') + '@example.com'
+            return User.objects.create(email=email, username=email, full_name=name, is_active_broker=True, **fields)
+
+        cls.priya = broker('Priya Sharma')
+        cls.priyanka = broker('Priyanka Sharma')
+        cls.sharmila = broker('Sharmila Rao')
+        cls.ravi = broker('Ravi Kulkarni')
+        User.objects.create(email='seller@example.com', username='seller@example.com', full_name='Anil Sharma',
+                            is_active_seller=True)
+        cls.staff = User.objects.create(email='staff@example.com', username='staff@example.com', is_staff=True)
+
+    def search(self, user=None, status=200, **params):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        response = client.get(reverse('search-profiles'), params)
+        self.assertEqual(response.status_code, status, response.data)
+        return response.data
+
+    def names(self, **params):
+        return [row['full_name'] for row in self.search(**params)['results']]
+
+    def test_exact_words_rank_above_typo_matches(self):
+        self.assertEqual(self.names(query='sharma'), ['Priya Sharma', 'Priyanka Sharma', 'Sharmila Rao'])
+        # Misspelt: only trigram similarity finds these, the closest first
+        self.assertEqual(self.names(query='Kulkarny'), ['Ravi Kulkarni'])
+        self.assertEqual(self.names(query='Priyanka Sharmaa')[0], 'Priyanka Sharma')
+        self.assertEqual(self.names(query='zzzz'), [])
+
+    def test_role_filters_profiles(self):
+        self.assertEqual(self.names(query='Anil'), [])
+        self.assertEqual(self.names(query='Anil', role='SELLER'), ['Anil Sharma'])
+        self.search(status=400, query='Anil', role='ADMIN')
+
+    def test_email_search_is_staff_only(self):
+        self.assertEqual(self.names(query='example.com'), [])
+        self.assertEqual(len(self.names(user=self.staff, query='example.com')), 4)
+
+    def test_search_by_id(self):
+        self.assertEqual(self.names(query=str(self.ravi.pk)), ['Ravi Kulkarni'])
+        self.assertEqual(self.names(query=self.ravi.pk.hex), ['Ravi Kulkarni'])
+        self.assertEqual(self.names(query=str(uuid.uuid4())), [])
+
+    def test_malformed_input_is_400(self):
+        malformed_id = str(self.ravi.pk)[:-1] + 'g'
+        for query in (malformed_id, str(self.ravi.pk)[:-1] + '-', 'sharma\x00'):
+            with self.subTest(query=query):
+                self.assertIn('query', self.search(status=400, query=query))
+
+    def test_pagination(self):
+        first = self.search(query='sharma', page_size=2)
+        self.assertEqual(first['count'], 3)
+        second = APIClient().get(first['next']).data
+        self.assertIsNone(second['next'])
+        names = [row['full_name'] for row in first['results'] + second['results']]
+        self.assertEqual(names, ['Priya Sharma', 'Priyanka Sharma', 'Sharmila Rao'])
+
+        # The unfiltered directory pages in name order
+        self.assertEqual(self.names(page_size=2, page=2), ['Ravi Kulkarni', 'Sharmila Rao'])
+        self.search(status=404, query='sharma', page=5)
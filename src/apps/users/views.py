@@ -1,21 +1,28 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.mail import send_mail
 from django.conf import settings
-from django.utils import timezone
 from .models import User
-import random
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import generics
 from rest_framework.permissions import AllowAny
 from rest_framework import status, permissions
 from .serializers import UserSerializer # Ensure you have this
+from . import otp
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+import re
+import uuid
+from datetime import timedelta
 
 from .models import User, KycVerification, BrokerProfile
 from apps.properties.models import Property  # <--- Added Property model import
+from apps.admin_panel.counters import dashboard_stats
+from apps.notifications.outbox import queue_mail
 
 User = get_user_model()
 
@@ -25,25 +32,19 @@ class SendOtpView(APIView):
         if not email:
             return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 1. Generate 6-digit OTP
-        otp = str(random.randint(100000, 999999))
-        
-        # 2. Get or Create User
+        # 1. Get or Create User
         # We use 'username' as email because AbstractUser requires a username
-        user, created = User.objects.get_or_create(email=email, defaults={'username': email})
-        
-        # 3. Save OTP to DB
-        user.otp = otp
-        user.otp_created_at = timezone.now()
-        user.save()
+        User.objects.get_or_create(email=email, defaults={'username': email})
 
-        # 4. Send Email (This will print to Console in dev)
-        send_mail(
+        # 2. Generate 6-digit OTP (kept in the cache, expires by itself; see otp.py)
+        code = otp.issue(email)
+
+        # 3. Queue the Email; `manage.py dispatch_mail` sends it (prints to Console in dev)
+        queue_mail(
             subject='Your SaudaPakka Login OTP',
-            message=f'Your OTP is: {otp}',
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[email],
-            fail_silently=False,
+            message=f'Your OTP is: {code}',
+            recipient=email,
+            expires_in=timedelta(seconds=otp.ttl()), # Useless once the code has expired
         )
 
         return Response({'message': 'OTP sent successfully! Check your console.'})
@@ -51,26 +52,20 @@ class SendOtpView(APIView):
 class VerifyOtpView(APIView):
     def post(self, request):
         email = request.data.get('email')
-        otp = request.data.get('otp')
+        code = request.data.get('otp')
 
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        # 1. Check if OTP matches
-        if user.otp != otp:
-            return Response({'error': 'Invalid OTP'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # 2. Check Expiry (Example: 5 mins validity)
-        if (timezone.now() - user.otp_created_at).total_seconds() > 300:
-             return Response({'error': 'OTP Expired'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # 3. Clear OTP
-        user.otp = None
-        user.save()
+        # 1. Check the OTP (expiry, attempt limit and single use are handled by the store)
+        try:
+            otp.verify(email, code)
+        except otp.OtpError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 4. Generate JWT Token
+        # 2. Generate JWT Token
         refresh = RefreshToken.for_user(user)
         
         return Response({
@@ -137,29 +132,55 @@ class UpgradeRoleView(APIView):
         else:
             return Response({"error": "Invalid role. Choose 'SELLER' or 'BROKER'"}, status=400)
 
+class ProfileSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+PROFILE_ROLES = {'BROKER': 'is_active_broker', 'SELLER': 'is_active_seller'}
+# One UUID-long word with a digit in it is a (mistyped) id, never a name: 400 rather than a name search
+UUID_LIKE = re.compile(r'(?=.*\d)[\w{}-]{32,}')
+
 class SearchProfileView(generics.ListAPIView):
+    """
+    ?query=<name, or a user id>&role=BROKER|SELLER
+
+    Names are matched as substrings or, for typos, by trigram word similarity
+    (both served by the pg_trgm GIN indexes on users_user), best match first.
+    Staff can also search by email. A malformed id or an unknown role is a 400.
+    """
     permission_classes = [AllowAny]
     serializer_class = UserSerializer # You might want a simpler serializer for public view
+    pagination_class = ProfileSearchPagination
 
     def get_queryset(self):
-        query = self.request.query_params.get('query', '')
+        query = self.request.query_params.get('query', '').strip()
         role = self.request.query_params.get('role', 'BROKER') # Default search Broker
+        if role not in PROFILE_ROLES:
+            raise ValidationError({'role': "Expected 'BROKER' or 'SELLER'."})
+        if '\x00' in query: # PostgreSQL rejects NUL in text parameters
+            raise ValidationError({'query': "Invalid characters."})
 
-        queryset = User.objects.all()
+        queryset = User.objects.only(*UserSerializer.Meta.fields).filter(**{PROFILE_ROLES[role]: True})
 
-        if role == 'BROKER':
-            queryset = queryset.filter(is_active_broker=True)
-        elif role == 'SELLER':
-            queryset = queryset.filter(is_active_seller=True)
+        if not query:
+            return queryset.order_by('full_name', 'id')
 
-        if query:
-            # Search by Name or ID (UUID)
-            if len(query) > 20: # Assuming it's a UUID
-                queryset = queryset.filter(id=query)
-            else:
-                queryset = queryset.filter(full_name__icontains=query)
-        
-        return queryset
+        # Search by ID (UUID) or Name
+        try:
+            return queryset.filter(id=uuid.UUID(query)).order_by('id')
+        except ValueError:
+            if UUID_LIKE.fullmatch(query):
+                raise ValidationError({'query': "Not a valid user id."})
+
+        matches = Q(full_name__icontains=query) | Q(full_name__trigram_word_similar=query)
+        if self.request.user.is_staff:
+            matches |= Q(email__icontains=query)
+        return (
+            queryset.filter(matches)
+            .annotate(similarity=TrigramWordSimilarity(query, 'full_name'))
+            .order_by('-similarity', 'full_name', 'id')
+        )
     
 # Add to src/apps/users/views.py
 
@@ -167,13 +188,14 @@ class AdminDashboardStats(APIView):
     permission_classes = [permissions.IsAdminUser] # STRICTLY ADMIN ONLY
 
     def get(self, request):
+        stats = dashboard_stats()
         return Response({
-            "total_users": User.objects.count(),
-            "active_sellers": User.objects.filter(is_active_seller=True).count(),
-            "active_brokers": User.objects.filter(is_active_broker=True).count(),
-            "total_properties": Property.objects.count(),
-            "pending_properties": Property.objects.filter(verification_status='PENDING').count(),
-            "verified_properties": Property.objects.filter(verification_status='VERIFIED').count(),
+            "total_users": stats['users']['total'],
+            "active_sellers": stats['users']['sellers'],
+            "active_brokers": stats['users']['brokers'],
+            "total_properties": stats['properties']['total'],
+            "pending_properties": stats['properties']['pending'],
+            "verified_properties": stats['properties']['verified'],
         })
 
 class UserProfileView(APIView):
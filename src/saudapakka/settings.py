@@ -26,6 +26,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third Party
     'rest_framework',
@@ -35,6 +36,7 @@ INSTALLED_APPS = [
     'apps.users',
     'apps.properties',
     'apps.mandates',
+    'apps.notifications',
     # admin panel 
     'apps.admin_panel',
 ]
@@ -87,6 +89,30 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared by every worker, so invalidations (listing catalogue version, user
+# snapshots) and OTPs are seen by all of them. With REDIS_URL set (docker-compose
+# does) it is Redis; otherwise CACHE_BACKEND/CACHE_LOCATION, by default a
+# database table (`manage.py createcachetable`; the test runner creates it).
+# Guest page caching and JWT user snapshots are off on the database cache.
+# Per-process LocMemCache fails `manage.py check` unless DEBUG is on.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'django_cache'),
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -123,6 +149,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files (listing images, documents)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -136,7 +166,7 @@ EMAIL_HOST_USER = 'support@saudapakka.com'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication', # JWTAuthentication + cached user lookup
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny', # We handle permissions in views manually
@@ -151,4 +181,80 @@ SIMPLE_JWT = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True  # Only for Development!
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+
+# Semantic search: dotted path to an apps.properties.embeddings.BaseEmbedder subclass.
+# The default hashing embedder is deterministic and offline (dev/tests).
+PROPERTY_EMBEDDER = os.environ.get('PROPERTY_EMBEDDER', 'apps.properties.embeddings.HashingEmbedder')
+PROPERTY_EMBEDDING_BATCH_SIZE = int(os.environ.get('PROPERTY_EMBEDDING_BATCH_SIZE', 64))
+# Semantic search takes limit * this many candidates (at most 1000) from the
+# half-precision ANN index and re-ranks them by exact distance (1 = no re-rank).
+# Not used with PROPERTY_EMBEDDING_COMPACT, where no full-precision vector is stored.
+PROPERTY_SEARCH_RERANK_FACTOR = int(os.environ.get('PROPERTY_SEARCH_RERANK_FACTOR', 4))
+# Store embeddings as halfvec (half the row size; search then skips the exact re-rank).
+# Run `manage.py embed_properties --convert-storage` after changing it.
+PROPERTY_EMBEDDING_COMPACT = os.environ.get('PROPERTY_EMBEDDING_COMPACT', '0') == '1'
+
+# Guest listing responses are cached per normalised query for this many seconds,
+# and dropped early whenever the public catalogue changes (apps.properties.cache).
+# Only on an in-memory backend: with DatabaseCache pages are not cached at all.
+LISTINGS_CACHE_ALIAS = 'default'
+LISTINGS_CACHE_TTL = int(os.environ.get('LISTINGS_CACHE_TTL', 300))
+# Filter sidebar counts (/api/listings/facets/) are cached for less time, per filter set and visibility scope.
+LISTINGS_FACETS_CACHE_TTL = int(os.environ.get('LISTINGS_FACETS_CACHE_TTL', 60))
+
+# Serve admin dashboard numbers from pre-computed counters instead of COUNT queries.
+# Run `manage.py rebuild_dashboard_counters` once after switching this on.
+ADMIN_DASHBOARD_COUNTERS = os.environ.get('ADMIN_DASHBOARD_COUNTERS', '0') == '1'
+
+# Listing photos are resized into thumb/card/full WebP+JPEG copies (and the original
+# stripped of EXIF) by `manage.py process_property_images --loop`. Inline processing
+# in the request is for dev/tests only.
+PROPERTY_IMAGES_INLINE = os.environ.get('PROPERTY_IMAGES_INLINE', '0') == '1'
+
+# Resumable document uploads (apps.properties.uploads): per-document size caps,
+# the largest chunk accepted per request, and where partial files are assembled.
+DOCUMENT_UPLOAD_MAX_SIZES = {
+    'doc_7_12': 20 * 1024 * 1024,
+    'doc_mojani': 20 * 1024 * 1024,
+    'doc_na_order': 20 * 1024 * 1024,
+    'doc_layout_order': 30 * 1024 * 1024,
+    'doc_layout_copy': 50 * 1024 * 1024,
+    'doc_building_perm': 30 * 1024 * 1024,
+    'doc_floor_plan': 30 * 1024 * 1024,
+}
+DOCUMENT_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+DOCUMENT_UPLOAD_TEMP_DIR = os.environ.get('DOCUMENT_UPLOAD_TEMP_DIR', BASE_DIR / 'uploads_in_progress')
+
+# "Recently viewed" writes are buffered per process (apps.properties.recent_views)
+# and flushed every RECENT_VIEWS_FLUSH_INTERVAL seconds or RECENT_VIEWS_FLUSH_SIZE
+# views; each user keeps at most RECENTLY_VIEWED_LIMIT rows.
+RECENTLY_VIEWED_LIMIT = int(os.environ.get('RECENTLY_VIEWED_LIMIT', 50))
+RECENT_VIEWS_FLUSH_SIZE = 100
+RECENT_VIEWS_FLUSH_INTERVAL = 5
+
+# Outbound mail is queued (apps.notifications.outbox) and sent by `manage.py dispatch_mail`:
+# this many per SMTP connection, retried with exponential backoff from
+# MAIL_OUTBOX_RETRY_SECONDS, and marked FAILED after MAIL_OUTBOX_MAX_ATTEMPTS.
+# `manage.py purge_outbox` deletes finished rows after MAIL_OUTBOX_RETENTION_DAYS.
+MAIL_OUTBOX_BATCH_SIZE = 50
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+MAIL_OUTBOX_RETRY_SECONDS = 30
+MAIL_OUTBOX_RETENTION_DAYS = 7
+
+# Login OTPs (apps.users.otp) live in this cache for OTP_TTL_SECONDS, with at most
+# OTP_MAX_ATTEMPTS verification tries each. It must be shared by all workers.
+OTP_CACHE_ALIAS = 'default'
+OTP_TTL_SECONDS = 300
+OTP_MAX_ATTEMPTS = 5
+
+# JWT-authenticated requests rebuild request.user from a cached snapshot of the
+# user's row (apps.users.authentication) for up to this many seconds. Only with a
+# shared non-database cache (Redis/memcached); otherwise the row is read per request.
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TTL = 60
+
+# Bulk listing import (apps.properties.importer): rows per bulk INSERT, and the most
+# rows one API upload may contain (the import_listings command has no limit).
+PROPERTY_IMPORT_BATCH_SIZE = 1000
+PROPERTY_IMPORT_MAX_ROWS = 10000
@@ -8,7 +8,7 @@ urlpatterns = [
     path('api/', include('apps.users.urls')),
     path('api/', include('apps.properties.urls')), # <-- UNCOMMENT THIS NOW
     path('api/admin-panel/', include('apps.admin_panel.urls')),
-    # path('api/', include('apps.mandates.urls')), 
+    path('api/', include('apps.mandates.urls')),
 ]
 
 # Serve media files in development